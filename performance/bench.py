@@ -0,0 +1,325 @@
+"""
+Benchmark suite for treys.
+
+Each benchmark times a loop over many operations (not single calls, so the
+timer's own overhead doesn't swamp what we measure), on data drawn from a
+fixed seed.  A few warmup runs come first, and then repeated runs give the
+statistics per operation: min, median, mean and standard deviation.
+Memory benchmarks measure the resident size of a fresh interpreter after
+some setup, less that of a bare one.
+
+    python performance/bench.py                      # run everything
+    python performance/bench.py -k eval7 -k batch    # only matching names
+    python performance/bench.py --json out.json      # save the results
+    python performance/bench.py --compare out.json   # flag regressions
+
+With --compare, any benchmark whose median is worse than the baseline's by
+more than --threshold (10% by default) is flagged, and the exit status is 1.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from treys import Deck, Evaluator, card  # noqa: E402
+from treys.deck import Dealer  # noqa: E402
+from treys.lookup import LookupTable  # noqa: E402
+
+SEED = 1234
+HANDS = 10000
+
+# (name, kind, function); see the benchmark decorator.
+BENCHMARKS = []
+
+
+def benchmark(name, kind='time'):
+    """
+    Registers a benchmark.  For kind 'time' the function takes no arguments
+    and returns (run, ops): a callable to time, and the number of operations
+    each call of it performs.  For kind 'memory' it returns the source of a
+    snippet to set up in a fresh interpreter.
+    """
+    def register(f):
+        BENCHMARKS.append((name, kind, f))
+        return f
+    return register
+
+
+def deal(nboard, n=HANDS, seed=SEED):
+    """Returns :n (hand, board) pairs, with boards of :nboard cards."""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(n):
+        cards = rng.sample(card.FULL_DECK, 2 + nboard)
+        pairs.append((cards[:2], cards[2:]))
+    return pairs
+
+
+def evaluating(evaluator, nboard):
+    pairs = deal(nboard)
+    evaluate = evaluator.evaluate
+
+    def run():
+        for hand, board in pairs:
+            evaluate(hand, board)
+    return run, len(pairs)
+
+
+for _engine, _compact in (('combinations', False), ('combinations', True), ('direct', False)):
+    for _n in (5, 6, 7):
+        _name = 'eval%d.%s%s' % (_n, _engine, '.compact' if _compact else '')
+        benchmark(_name)(lambda e=_engine, c=_compact, n=_n: evaluating(Evaluator(e, c), n - 2))
+
+
+@benchmark('eval7.dag')
+def eval7_dag():
+    # only if the state table is already on disk; generating it takes a minute
+    from treys import dag
+    if not os.path.exists(dag.DEFAULT_PATH):
+        return None
+    return evaluating(Evaluator('dag'), 5)
+
+
+@benchmark('batch7')
+def batch7():
+    evaluator = Evaluator()
+    rows = [hand + board for hand, board in deal(5)]
+    evaluator.evaluate_batch(rows[:1])
+    return (lambda: evaluator.evaluate_batch(rows)), len(rows)
+
+
+@benchmark('parallel7')
+def parallel7():
+    from treys.parallel import ParallelEvaluator
+    rows = [hand + board for hand, board in deal(5, n=10 * HANDS)]
+    pe = ParallelEvaluator()
+    atexit.register(pe.close)
+    pe.evaluate(rows[:1])
+    return (lambda: pe.evaluate(rows)), len(rows)
+
+
+@benchmark('lookup.build')
+def lookup_build():
+    return (lambda: LookupTable()), 1
+
+
+@benchmark('deck.deal')
+def deck_deal():
+    random.seed(SEED)
+
+    def run():
+        for _ in range(1000):
+            deck = Deck()
+            deck.draw(5)
+            deck.draw(2)
+            deck.draw(2)
+    return run, 1000
+
+
+@benchmark('dealer.deal')
+def dealer_deal():
+    dealer = Dealer(hands=2, seed=SEED)
+    return (lambda: dealer.deal(HANDS)), HANDS
+
+
+def _python(code, env=None):
+    subprocess.check_call([sys.executable, '-c', code], cwd=ROOT, env=env)
+
+
+@benchmark('startup.import')
+def startup_import():
+    return (lambda: _python('import treys')), 1
+
+
+@benchmark('startup.evaluator')
+def startup_evaluator():
+    # against a warm table cache of our own, so that we time the load, not the build
+    env = dict(os.environ, TREYS_CACHE=_cache_dir())
+    code = 'from treys import Evaluator; Evaluator()'
+    _python(code, env)
+    return (lambda: _python(code, env)), 1
+
+
+@benchmark('memory.evaluator', kind='memory')
+def memory_evaluator():
+    return 'from treys import Evaluator; e = Evaluator()'
+
+
+@benchmark('memory.evaluator.compact', kind='memory')
+def memory_evaluator_compact():
+    return 'from treys import Evaluator; e = Evaluator(compact=True)'
+
+
+@benchmark('memory.evaluator.direct', kind='memory')
+def memory_evaluator_direct():
+    return "from treys import Evaluator; e = Evaluator('direct')"
+
+
+_cache = []
+
+
+def _cache_dir():
+    if not _cache:
+        _cache.append(tempfile.mkdtemp(prefix='treys-bench-'))
+    return _cache[0]
+
+
+# The resident size of the current process: VmRSS where /proc has it (the
+# peak in ru_maxrss survives exec, so would include that of this process);
+# failing that, ru_maxrss.
+_RSS = """
+import resource, sys
+try:
+    with open('/proc/self/status') as f:
+        print(next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmRSS:')))
+except (OSError, StopIteration):
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(r if sys.platform == 'darwin' else r * 1024)
+"""
+
+
+def _rss(setup):
+    """The resident size, in bytes, of a fresh interpreter after running :setup."""
+    env = dict(os.environ, TREYS_CACHE=_cache_dir())
+    code = '%s\n%s' % (setup, _RSS)
+    out = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, env=env)
+    return int(out.split()[-1])
+
+
+def _summary(samples, unit):
+    return {
+        'unit': unit,
+        'samples': samples,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.mean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def measure(kind, f, repeat, warmup):
+    """Runs one benchmark, returning its summary (or None if it doesn't apply here)."""
+    if kind == 'memory':
+        setup = f()
+        _rss(setup)
+        bare = [_rss('pass') for _ in range(repeat)]
+        used = [_rss(setup) - statistics.median(bare) for _ in range(repeat)]
+        return _summary(used, 'bytes')
+    made = f()
+    if made is None:
+        return None
+    run, ops = made
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) / ops)
+    return _summary(samples, 's/op')
+
+
+def metadata():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': numpy_version,
+        'seed': SEED,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def _show(value, unit):
+    if unit == 'bytes':
+        return '%.1fMb' % (value / 1e6)
+    for scale, suffix in ((1, 's'), (1e3, 'ms'), (1e6, 'us'), (1e9, 'ns')):
+        if value * scale >= 1:
+            return '%.3g%s' % (value * scale, suffix)
+    return '%.3gns' % (value * 1e9)
+
+
+def compare(results, baseline, threshold):
+    """Prints the change in each median against :baseline; returns the names of the regressions."""
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if result is None or base is None or not base['median']:
+            continue
+        change = result['median'] / base['median'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print('%-28s %10s -> %10s  %+6.1f%%%s' % (
+            name, _show(base['median'], base['unit']), _show(result['median'], result['unit']),
+            100 * change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the treys benchmarks.")
+    parser.add_argument('-k', dest='only', action='append', default=[],
+                        help="only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument('--repeat', type=int, default=7, help="timed runs per benchmark")
+    parser.add_argument('--warmup', type=int, default=2, help="untimed runs first")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', help="compare against the results in this file")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative slowdown of the median counted as a regression")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    chosen = [(name, kind, f) for name, kind, f in BENCHMARKS
+              if not args.only or any(k in name for k in args.only)]
+    if args.list:
+        for name, kind, _ in chosen:
+            print('%-28s %s' % (name, kind))
+        return 0
+
+    results = {}
+    for name, kind, f in chosen:
+        result = measure(kind, f, args.repeat, args.warmup)
+        results[name] = result
+        if result is None:
+            print('%-28s skipped' % name)
+        else:
+            print('%-28s median %10s  min %10s  stdev %10s' % (
+                name, _show(result['median'], result['unit']),
+                _show(result['min'], result['unit']), _show(result['stdev'], result['unit'])))
+        sys.stdout.flush()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n%d regression(s): %s" % (len(regressions), ', '.join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
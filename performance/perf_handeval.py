@@ -1,42 +1,37 @@
-import treys.card as card
-from hand_evaluator import HandEvaluator
-import time
+"""
+Times pokerhand-eval (pip install pokereval), for comparison with
+bench.py.  Not part of the treys benchmarks proper, since it needs that
+package; run it on its own.
+"""
 import random
+import time
 
-def setup(n):
+try:
+    from pokereval.card import Card
+    from pokereval.hand_evaluator import HandEvaluator
+except ImportError:
+    raise SystemExit("perf_handeval.py needs pokerhand-eval: pip install pokereval")
 
-    hands = []
-    boards = []
+SEED = 1234
 
-    full_deck = []
-    for i in range(2, 14 + 1):
-        for j in range(1, 4 + 1):
-            # method renamed, but signature is in the same
-            # broken form as in the original
-            full_deck.append(card.make(i, j))
 
+def setup(n):
+    rng = random.Random(SEED)
+    full_deck = [Card(rank, suit) for rank in range(2, 14 + 1) for suit in range(1, 4 + 1)]
+    hands = []
+    boards = []
     for i in range(n):
-        deck = list(full_deck)
-        random.shuffle(deck)
-        hand = []
-        board = []
-        for j in range(2):
-            hand.append(deck.pop(0))
-        for j in range(5):
-            board.append(deck.pop(0))
-        hands.append(hand)
-        boards.append(board)
+        cards = rng.sample(full_deck, 7)
+        hands.append(cards[:2])
+        boards.append(cards[2:])
     return boards, hands
 
 N = 10000
-cumtime = 0.0
 boards, hands = setup(N)
-for i in range(len(boards)):
-    start = time.time()
+start = time.perf_counter()
+for i in range(N):
     HandEvaluator.evaluate_hand(hands[i], boards[i])
-    cumtime += (time.time() - start)
+avg = (time.perf_counter() - start) / N
 
-avg = float(cumtime / N)
 print("[*] Pokerhand-eval: Average time per evaluation: %f" % avg)
 print("[*] Pokerhand-eval: Evaluations per second = %f" % (1.0 / avg))
-
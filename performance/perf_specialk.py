@@ -1,52 +1,46 @@
-import time
-from SevenEval import SevenEval
-from FiveEval import FiveEval
+"""
+Times the SpecialK evaluator (its Python port, providing the SevenEval
+and FiveEval modules), for comparison with bench.py.  Not part of the
+treys benchmarks proper, since it needs that code on the path; run it
+on its own.
+"""
 import random
+import time
+
+try:
+    from SevenEval import SevenEval
+    from FiveEval import FiveEval
+except ImportError:
+    raise SystemExit("perf_specialk.py needs the SpecialK SevenEval and FiveEval modules on the path")
+
+SEED = 1234
+
 
 def setup(n, m):
+    rng = random.Random(SEED)
     hands = []
     boards = []
     for i in range(n):
-        deck = range(52)
-        random.shuffle(deck)
-        hand = []
-        board = []
-        for j in range(2):
-            hand.append(deck.pop(0))
-        for j in range(m):
-            board.append(deck.pop(0))
-        hands.append(hand)
-        boards.append(board)
+        cards = rng.sample(range(52), 2 + m)
+        hands.append(cards[:2])
+        boards.append(cards[2:])
     return boards, hands
 
-s = SevenEval()
-N = 10000
 
-cumtime = 0.0
-boards, hands = setup(N, 5)
-for i in range(len(boards)):
-    start = time.time()
-    s.getRankOfSeven(*(boards[i] + hands[i]))
-    cumtime += (time.time() - start)
+def timed(evaluate, boards, hands):
+    start = time.perf_counter()
+    for i in range(len(boards)):
+        evaluate(*(boards[i] + hands[i]))
+    return (time.perf_counter() - start) / len(boards)
 
-avg = float(cumtime / N)
+N = 10000
+
+avg = timed(SevenEval().getRankOfSeven, *setup(N, 5))
 print("7 card evaluation:")
 print("[*] SpecialK: Average time per evaluation: %f" % avg)
 print("[*] SpecialK: Evaluations per second = %f" % (1.0 / avg))
 
-####
-
-f = FiveEval()
-
-cumtime = 0.0
-boards, hands = setup(N, 3)
-for i in range(len(boards)):
-    start = time.time()
-    f.getRankOfFive(*(boards[i] + hands[i]))
-    cumtime += (time.time() - start)
-
-avg = float(cumtime / N)
+avg = timed(FiveEval().getRankOfFive, *setup(N, 3))
 print("5 card evaluation:")
 print("[*] SpecialK: Average time per evaluation: %f" % avg)
 print("[*] SpecialK: Evaluations per second = %f" % (1.0 / avg))
-
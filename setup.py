@@ -12,7 +12,14 @@ setup(
     author='wstlabs',
     url='https://github.com/wstlabs/treys',
     license='MIT',
-    packages=['treys'],
+    packages=['treys', 'treys.util'],
+    package_data={'treys': ['data/*.bin']},
+    extras_require={
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': ['treys-eval = treys.pipeline:main'],
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
@@ -0,0 +1,58 @@
+import itertools
+import math
+import random
+from treys import card, suits
+from treys.boardindex import BoardIndex, board_index, shared_index
+
+# the known numbers of classes of flops, turns and rivers
+CLASSES = {3: 1755, 4: 16432, 5: 134459}
+
+rng = random.Random(25)
+for size in (3, 4, 5):
+    index = shared_index(size)
+    assert len(index) == CLASSES[size]
+    assert sum(index.multiplicity) == math.comb(52, size)
+    assert len(index.keys) == len(index)
+    for i, board in enumerate(index.boards):
+        assert index.index(board) == i
+    for _ in range(500):
+        board = rng.sample(card.FULL_DECK, size)
+        i = board_index(board)
+        # the representative is the canonical form, and relabelling the
+        # suits doesn't change the class
+        assert index.boards[i] == suits.canonical(board)[0][0]
+        for p in range(len(suits.PERMUTATIONS)):
+            assert index.index(suits.permute(board, p)) == i
+    assert shared_index(size) is index
+
+# every flop, counted by class, gives the multiplicities
+flops = BoardIndex(3)
+tally = [0] * len(flops)
+for board in itertools.combinations(card.FULL_DECK, 3):
+    tally[flops.index(board)] += 1
+assert tally == list(flops.multiplicity)
+
+# tabulate gives one value per class, to look up by index: here the
+# ranks, which don't depend on the suits
+ranks = lambda board: sorted(map(card.get_rank_int, board))
+table = flops.tabulate(ranks)
+assert len(table) == len(flops)
+for _ in range(500):
+    board = rng.sample(card.FULL_DECK, 3)
+    assert table[flops.index(board)] == ranks(board)
+
+for bad in ([card.make('As'), card.make('Kd')], [card.make('As')] * 3):
+    try:
+        flops.index(bad)
+    except ValueError:
+        pass
+    else:
+        assert False, bad
+try:
+    BoardIndex(6)
+except ValueError:
+    pass
+else:
+    assert False
+
+print("all done")
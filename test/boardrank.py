@@ -0,0 +1,44 @@
+import random
+from treys import card, suits
+from treys.boardrank import COMBOS, BoardRanker, combo_index, rank_all
+from treys.evaluator import Evaluator
+
+evaluator = Evaluator()
+rng = random.Random(10)
+ranker = BoardRanker(maxsize=8)
+assert len(COMBOS) == 1326 and len(set(COMBOS)) == 1326
+
+# royal flush, quads, a paired board, a flush board and random ones
+boards = [[card.make(c) for c in b.split()] for b in
+          ('Ah Kh Qh Jh Th', '7s 7h 7d 7c 2s', '9s 9h 4d 4c Ks', '2h 5h 8h Jh 3c')]
+boards += [rng.sample(card.FULL_DECK, 5) for _ in range(20)]
+for board in boards:
+    ranks = rank_all(board)
+    for i, (a, b) in enumerate(COMBOS):
+        if a in board or b in board:
+            assert ranks[i] == 0
+        else:
+            assert ranks[i] == evaluator.evaluate([a, b], board), (card.pretty(board), i)
+
+    ranking = ranker.ranking(board)
+    assert list(ranking.ranks) == list(ranks)
+    assert len(ranking) == 1081
+    assert [ranks[i] for i in ranking.order] == sorted(r for r in ranks if r)
+    # the percentile of a few combos, counted the long way
+    for i in rng.sample([i for i in range(1326) if ranks[i]], 5):
+        others = [r for j, r in enumerate(ranks) if r and j != i]
+        p = (sum(r > ranks[i] for r in others) + 0.5 * sum(r == ranks[i] for r in others)) / len(others)
+        assert abs(ranking.percentiles[i] - p) < 1e-9
+        assert ranking.percentile(COMBOS[i]) == ranking.percentiles[i]
+        assert ranking.rank(COMBOS[i][::-1]) == ranks[i]
+
+    # a board with its suits relabelled is a hit, ranked just as it should be
+    hits = ranker.hits
+    other = suits.permute(board, rng.randrange(1, 24))
+    assert list(ranker.ranking(other).ranks) == list(rank_all(other))
+    assert ranker.hits == hits + 1
+
+assert len(ranker.cache) <= 8
+assert combo_index(COMBOS[100]) == combo_index(COMBOS[100][::-1]) == 100
+
+print("all done")
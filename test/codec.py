@@ -0,0 +1,38 @@
+import random
+from treys import card, codec
+
+rng = random.Random(5)
+for _ in range(200):
+    cards = rng.sample(card.FULL_DECK, rng.randrange(1, 10))
+    text = codec.format_cards(cards)
+    assert list(codec.parse(text)) == [card.make(text[i:i + 2]) for i in range(0, len(text), 2)]
+    assert list(codec.parse(text)) == cards
+
+hands = [rng.sample(card.FULL_DECK, 7) for _ in range(100)]
+texts = [codec.format_cards(h) for h in hands]
+assert list(codec.parse_many(texts, 7)) == [c for h in hands for c in h]
+assert codec.format_many(codec.parse_many(texts), 7) == texts
+
+# odd strings are rejected, even where the whole would pair up again
+for bad in (['AhK', 'dQs'], ['Ah', 'K'], ['AhKdQ', 's2c']):
+    try:
+        codec.parse_many(bad)
+    except ValueError:
+        pass
+    else:
+        assert False, bad
+for bad in ('AhK', 'AhKx', 'Ah1d', 'Ahé'):
+    try:
+        codec.parse(bad)
+    except ValueError:
+        pass
+    else:
+        assert False, bad
+try:
+    codec.parse_many(['AhKd', 'AhKdQs'], 2)
+except ValueError:
+    pass
+else:
+    assert False
+
+print("all done")
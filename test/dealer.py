@@ -0,0 +1,45 @@
+from collections import Counter
+from treys import card
+from treys.deck import Dealer
+from treys.evaluator import Evaluator
+
+evaluator = Evaluator()
+board = [card.make(c) for c in ('Ah', 'Kd', '7c')]
+dead = [card.make(c) for c in ('2s', '3s')]
+dealer = Dealer(hands=3, hole=2, board=board, dead=dead, seed=42)
+assert dealer.width == 11 and dealer.draws == 8
+
+n = 20000
+out = dealer.deal(n)
+assert len(out) == n * dealer.width
+seen = Counter()
+for i in range(n):
+    deal = list(out[i * 11:(i + 1) * 11])
+    assert deal[:3] == board
+    assert len(set(deal)) == 11 and not set(deal) & set(dead)
+    seen.update(deal[3:])
+# every live card turns up about as often as every other: 8 draws from 47
+assert len(seen) == 47
+expected = n * 8 / 47
+assert all(abs(count - expected) < 0.1 * expected for count in seen.values()), seen
+
+# the same seed deals the same, split streams differ from it and each other
+assert Dealer(3, 2, board, dead, seed=42).deal(n) == out
+streams = [d.deal(100) for d in dealer.split(3)]
+assert streams[0] != streams[1] != streams[2] and streams[0] != out[:1100]
+assert [d.deal(100) for d in Dealer(3, 2, board, dead, seed=42).split(3)] == streams
+
+# dealt hands evaluate just as they do one by one
+fresh = Dealer(hands=1, hole=2, seed=7).deal(500)
+hands = [list(fresh[7 * i:7 * i + 7]) for i in range(500)]
+assert [int(r) for r in evaluator.evaluate_batch(hands)] == [evaluator.evaluate(h[5:], h[:5]) for h in hands]
+
+for args in (dict(board=[board[0]] * 2), dict(hands=30), dict(board=card.FULL_DECK[:6])):
+    try:
+        Dealer(**args)
+    except ValueError:
+        pass
+    else:
+        assert False, args
+
+print("all done")
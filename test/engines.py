@@ -0,0 +1,87 @@
+import itertools
+import random
+from treys import card
+from treys.equity import exact, remaining_cards, tally_showdown
+from treys.evaluator import Evaluator
+from treys.lookup import LookupTable, RANK_CLASS
+
+rng = random.Random(11)
+table = LookupTable()
+
+
+def category(hand):
+    """The rank class of 5 cards, worked out the long way."""
+    ranks = sorted((card.get_rank_int(c) for c in hand), reverse=True)
+    counts = sorted((ranks.count(r) for r in set(ranks)), reverse=True)
+    flush = len(set(card.get_suit_int(c) for c in hand)) == 1
+    straight = len(set(ranks)) == 5 and (ranks[0] - ranks[4] == 4 or ranks == [12, 3, 2, 1, 0])
+    if straight and flush:
+        return 1
+    if counts[0] == 4:
+        return 2
+    if counts == [3, 2]:
+        return 3
+    if flush:
+        return 4
+    if straight:
+        return 5
+    if counts[0] == 3:
+        return 6
+    if counts == [2, 2, 1]:
+        return 7
+    if counts[0] == 2:
+        return 8
+    return 9
+
+
+def five(hand):
+    """The rank of 5 cards, straight from the lookup tables."""
+    if hand[0] & hand[1] & hand[2] & hand[3] & hand[4] & 0xF000:
+        return table.flush[card.product_from_rankbits(
+            (hand[0] | hand[1] | hand[2] | hand[3] | hand[4]) >> 16)]
+    return table.unsuited[card.product_from_hand(hand)]
+
+
+def brute(hand):
+    """The best rank over all 5-card subsets of :hand."""
+    return min(five(list(c)) for c in itertools.combinations(hand, 5))
+
+
+# for plenty of flushes and straights
+two_suits = [c for c in card.FULL_DECK if card.get_suit_int(c) in (1, 2)]
+
+# 5-card ranks against their class, worked out independently
+for deck in (card.FULL_DECK, two_suits):
+    for _ in range(3000):
+        hand = rng.sample(deck, 5)
+        assert RANK_CLASS[five(hand)] == category(hand), card.pretty(hand)
+
+evaluators = [Evaluator(engine) for engine in Evaluator.ENGINES]
+evaluators += [Evaluator(engine, compact=True) for engine in Evaluator.ENGINES]
+for n in (5, 6, 7):
+    hands = [rng.sample(card.FULL_DECK, n) for _ in range(2000)]
+    hands += [rng.sample(two_suits, n) for _ in range(500)]
+    expected = [brute(h) for h in hands]
+    for e in evaluators:
+        got = [e.evaluate(h[:2], h[2:]) for h in hands]
+        assert got == expected, (e.engine, n)
+        assert [int(r) for r in e.evaluate_batch(hands)] == expected, (e.engine, n)
+
+# exact equity against every runout, one by one
+evaluator = Evaluator()
+for size, players in ((4, 2), (4, 3), (3, 2), (3, 3)):
+    deck = rng.sample(card.FULL_DECK, size + 2 * players)
+    board, hands = deck[:size], [deck[size + 2 * i:size + 2 * i + 2] for i in range(players)]
+    wins, ties = [0] * players, [0] * players
+    shares, squares = [0.0] * players, [0.0] * players
+    runouts = 0
+    for runout in itertools.combinations(remaining_cards(board, *hands), 5 - size):
+        full = board + list(runout)
+        tally_showdown([evaluator.evaluate(h, full) for h in hands], wins, ties, shares, squares)
+        runouts += 1
+    result = exact(hands, board, workers=0)
+    assert result.trials == runouts
+    assert result.wins == wins and result.ties == ties, (result.wins, wins, result.ties, ties)
+    assert all(abs(a - b) < 1e-9 for a, b in zip(result.shares, shares))
+
+print("all done")
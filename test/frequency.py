@@ -0,0 +1,39 @@
+import itertools
+import math
+import random
+from treys import card, frequency
+from treys.evaluator import Evaluator
+
+# the number of hands of each rank class, straight flush to high card
+KNOWN = {
+    5: [40, 624, 3744, 5108, 10200, 54912, 123552, 1098240, 1302540],
+    7: [41584, 224848, 3473184, 4047644, 6180020, 6461620, 31433400, 58627800, 23294460],
+}
+
+for n in (5, 7):
+    counted = frequency.count_ranks(n)
+    assert sum(counted) == math.comb(52, n)
+    classes = frequency.class_counts(counted)
+    assert [classes[c] for c in range(1, 10)] == KNOWN[n], (n, classes)
+    # the packaged counts are the same
+    assert list(frequency.counts(n)) == list(counted)
+
+# and a tally of every 5-card hand, evaluated directly
+evaluator = Evaluator()
+brute = [0] * frequency.RANKS
+deck = card.FULL_DECK
+for i in range(48):
+    hands = [[deck[i]] + list(rest) for rest in itertools.combinations(deck[i + 1:], 4)]
+    for r in evaluator.evaluate_batch(hands):
+        brute[r] += 1
+assert brute == list(frequency.count_ranks(5))
+
+# percentiles: the best hand beats nearly everything, the worst nothing
+assert frequency.percentile(1, 7) > 0.9999
+assert frequency.percentile(7462, 5) < 0.001
+rng = random.Random(20)
+ranks = sorted(rng.sample(range(1, 7463), 50))
+p = [frequency.percentile(r) for r in ranks]
+assert p == sorted(p, reverse=True)
+
+print("all done")
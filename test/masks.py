@@ -0,0 +1,41 @@
+import random
+from treys import card, masks
+from treys.evaluator import Evaluator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+evaluator = Evaluator()
+rng = random.Random(19)
+two_suits = [c for c in card.FULL_DECK if card.get_suit_int(c) in (1, 2)]
+
+assert len(masks.BIT) == 52 and len(set(masks.BIT.values())) == 52
+assert sum(masks.BIT.values()) == masks.FULL
+assert masks.to_cards(masks.FULL) == list(masks.CARDS)
+
+hands = [rng.sample(deck, n) for deck in (card.FULL_DECK, two_suits)
+         for n in (5, 6, 7) for _ in range(1000)]
+expected = [evaluator.evaluate(h[:2], h[2:]) for h in hands]
+mask_list = [masks.from_cards(h) for h in hands]
+assert [masks.evaluate(m) for m in mask_list] == expected
+assert [evaluator.evaluate_mask(m) for m in mask_list] == expected
+for m, h in zip(mask_list, hands):
+    assert sorted(masks.to_cards(m)) == sorted(h)
+
+# hands of one size, in bulk
+sevens = [h for h in hands if len(h) == 7]
+assert list(masks.from_hands(sevens)) == [masks.from_cards(h) for h in sevens]
+if numpy is not None:
+    assert [int(m) for m in masks.from_hands(numpy.array(sevens))] == [masks.from_cards(h) for h in sevens]
+assert list(masks.evaluate_many(masks.from_hands(sevens))) == [evaluator.evaluate(h[:2], h[2:]) for h in sevens]
+
+try:
+    masks.from_cards([card.make('Ah'), card.make('Ah')])
+except ValueError:
+    pass
+else:
+    assert False
+
+print("all done")
@@ -0,0 +1,37 @@
+import os
+import random
+import tempfile
+from treys import card, suits
+from treys.evaluator import Evaluator
+from treys.memo import CachingEvaluator
+
+evaluator = Evaluator()
+rng = random.Random(17)
+hands = [rng.sample(card.FULL_DECK, rng.choice((5, 6, 7))) for _ in range(3000)]
+
+for canonical in (False, True):
+    cached = CachingEvaluator(maxsize=1000, canonical=canonical)
+    for _ in range(2):
+        for h in hands:
+            assert cached.evaluate(h[:2], h[2:]) == evaluator.evaluate(h[:2], h[2:])
+    assert len(cached) == 1000
+    # hands with their suits relabelled share an entry when canonical
+    h = hands[-1]
+    hits = cached.hits
+    other = suits.permute(h, 9)
+    assert cached.evaluate(other[:2], other[2:]) == evaluator.evaluate(h[:2], h[2:])
+    assert cached.hits == hits + canonical
+
+    path = os.path.join(tempfile.mkdtemp(), 'memo.bin')
+    cached.save(path)
+    warm = CachingEvaluator(canonical=canonical)
+    assert warm.warm(path) == 1000
+    assert list(warm.cache.items()) == list(cached.cache.items())
+    try:
+        CachingEvaluator(canonical=not canonical).warm(path)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+print("all done")
@@ -0,0 +1,47 @@
+import itertools
+import random
+from treys import card, omaha
+from treys.evaluator import Evaluator
+
+evaluator = Evaluator()
+rng = random.Random(18)
+# two suits only, for plenty of flushes
+two_suits = [c for c in card.FULL_DECK if card.get_suit_int(c) in (1, 2)]
+
+
+def brute(hand, board):
+    """Exactly two hole cards and three of the board, every way."""
+    return min(evaluator.evaluate(list(pair), list(triple))
+               for pair in itertools.combinations(hand, 2)
+               for triple in itertools.combinations(board, 3))
+
+
+for deck in (card.FULL_DECK, two_suits):
+    for _ in range(300):
+        holes = rng.choice((4, 5, 6))
+        cards = rng.sample(deck, holes + rng.choice((3, 4, 5)))
+        hand, board = cards[:holes], cards[holes:]
+        assert omaha.evaluate(hand, board) == brute(hand, board), card.pretty(cards)
+        assert evaluator.evaluate_omaha(hand, board) == brute(hand, board)
+
+# a flush on the board doesn't count without two of the suit in hand
+board = [card.make(c) for c in ('2h', '5h', '9h', 'Jh', 'Kh')]
+hand = [card.make(c) for c in ('Ah', 'As', 'Ad', 'Ac')]
+assert omaha.evaluate(hand, board) == brute(hand, board)
+assert evaluator.get_rank_class(omaha.evaluate(hand, board)) != 4
+
+# one board against many hands
+table = omaha.OmahaBoard(board)
+for _ in range(100):
+    hand = rng.sample([c for c in card.FULL_DECK if c not in board], 4)
+    assert table.evaluate(hand) == brute(hand, board)
+
+for hand, board in ((card.FULL_DECK[:3], card.FULL_DECK[3:8]), (card.FULL_DECK[:4], card.FULL_DECK[4:6])):
+    try:
+        omaha.evaluate(hand, board)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+print("all done")
@@ -0,0 +1,39 @@
+import random
+from array import array
+from treys import card, codec
+from treys.deck import Dealer
+from treys.evaluator import Evaluator
+from treys.parallel import ParallelEvaluator, SharedTables
+
+evaluator = Evaluator()
+rng = random.Random(14)
+
+if __name__ == '__main__':
+    tables = SharedTables.create()
+    try:
+        for n in (5, 6, 7):
+            hands = [rng.sample(card.FULL_DECK, n) for _ in range(2000)]
+            assert [tables.evaluate(h) for h in hands] == [evaluator.evaluate(h[:2], h[2:]) for h in hands]
+    finally:
+        tables.close()
+
+    with ParallelEvaluator(workers=2) as pe:
+        for n in (5, 6, 7):
+            hands = [rng.sample(card.FULL_DECK, n) for _ in range(5000)]
+            expected = [evaluator.evaluate(h[:2], h[2:]) for h in hands]
+            assert list(pe.evaluate(hands)) == expected
+            # or a flat array of cards, with its width
+            flat = codec.parse_many([codec.format_cards(h) for h in hands], n)
+            assert list(pe.evaluate(flat, n)) == expected
+        deals = Dealer(hands=1, hole=2, seed=3).deal(1000)
+        assert list(pe.evaluate(deals, 7)) == [evaluator.evaluate([], list(deals[7 * i:7 * i + 7]))
+                                               for i in range(1000)]
+        assert list(pe.evaluate([])) == []
+        try:
+            pe.evaluate(array('I', card.FULL_DECK[:8]), 7)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+    print("all done")
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import tempfile
+from treys import card
+from treys.evaluator import Evaluator
+from treys.pipeline import rank_chunk, rank_lines
+
+# good rows rank as the evaluator does
+evaluator = Evaluator()
+ranks = rank_chunk(['AhKdQs2c3h', 'AhKdQsJcTh9s8s'])
+assert ranks[0] == evaluator.evaluate([card.make('Ah'), card.make('Kd')],
+                                      [card.make(c) for c in ('Qs', '2c', '3h')])
+assert ranks[1] == evaluator.evaluate([card.make('Ah'), card.make('Kd')],
+                                      [card.make(c) for c in ('Qs', 'Jc', 'Th', '9s', '8s')])
+
+# two rows of odd length mustn't pair up into two valid hands
+for texts in (['AhKdQs2c3h4', 'd5s6s7s8s9s'], ['AhKdQs2c3h', 'AhKdQs2c3h4', 'd5s6s7s8s9s']):
+    try:
+        rank_chunk(texts)
+    except ValueError as e:
+        assert 'row' in str(e), e
+    else:
+        raise AssertionError("odd-length rows were accepted: %r" % texts)
+try:
+    rank_lines(['AhKd,Qs2c3h4\n', 'd5,s6s7s8s9s\n'], 'csv', (0, 1))
+except ValueError as e:
+    assert str(e).startswith('row 0:'), e
+else:
+    raise AssertionError("odd-length rows were accepted")
+
+# and from the command line, the run fails
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'hands.csv')
+    with open(path, 'w') as f:
+        f.write('hand,board\nAhKd,Qs2c3h4\nd5,s6s7s8s9s\n')
+    run = subprocess.run([sys.executable, '-m', 'treys.pipeline', path],
+                         capture_output=True, text=True)
+    assert run.returncode == 1, run
+    assert 'row 0' in run.stderr, run.stderr
+    assert 'High Card' not in run.stdout and 'Straight' not in run.stdout, run.stdout
+
+print("all done")
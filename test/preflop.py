@@ -0,0 +1,44 @@
+from collections import Counter
+from treys import card
+from treys.boardrank import COMBOS
+from treys.preflop import CLASSES, COMBO_CLASS, LABELS, class_index, preflop_equity, shared_table
+
+table = shared_table()
+
+# 169 classes: 13 pairs of 6 combos, 78 suited of 4 and 78 offsuit of 12
+assert len(LABELS) == CLASSES == 169
+sizes = Counter(COMBO_CLASS)
+assert sum(sizes.values()) == 1326
+assert Counter(len(LABELS[i]) == 2 for i in sizes) == Counter({True: 13, False: 156})
+for i, n in sizes.items():
+    label = LABELS[i]
+    assert n == (6 if len(label) == 2 else 4 if label[2] == 's' else 12), label
+assert class_index([card.make('Ah'), card.make('Kh')]) == class_index('AKs')
+assert class_index([card.make('Kd'), card.make('Ah')]) == class_index('AKo')
+assert class_index([card.make('7c'), card.make('7s')]) == class_index('77')
+
+# equities of one class against another add up to 1, and against a random
+# hand average out to a half
+for i in range(CLASSES):
+    for j in range(CLASSES):
+        assert abs(table.matchups[CLASSES * i + j] + table.matchups[CLASSES * j + i] - 1) < 1e-5
+weighted = sum(table.random[i] * n for i, n in sizes.items()) / 1326
+assert abs(weighted - 0.5) < 1e-6
+
+# well-known values (the matchups also agree with equity.exact, averaged
+# over the combos of each class, but that takes a while)
+known = {('AA', None): 0.8520, ('KK', None): 0.8240, ('72o', None): 0.3458,
+         ('AA', 'KK'): 0.8195, ('AKs', 'QQ'): 0.4605, ('AKo', 'AQs'): 0.7012}
+for (a, b), e in known.items():
+    assert abs(preflop_equity(a, b) - e) < 1e-3, (a, b, preflop_equity(a, b))
+assert preflop_equity([card.make('Ah'), card.make('As')], 'KK') == preflop_equity('AA', 'KK')
+
+for bad in ('AKx', 'KAs', ''):
+    try:
+        class_index(bad)
+    except ValueError:
+        pass
+    else:
+        assert False, bad
+
+print("all done")
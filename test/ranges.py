@@ -0,0 +1,61 @@
+from treys import card, ranges
+from treys.evaluator import Evaluator
+
+evaluator = Evaluator()
+
+# combo counts of the shorthand
+assert len(ranges.combos('QQ')) == 6
+assert len(ranges.combos('AKs')) == 4
+assert len(ranges.combos('AKo')) == 12
+assert len(ranges.combos('AK')) == 16
+assert len(ranges.parse('QQ+')) == 18
+assert len(ranges.parse('ATs+')) == 16
+assert len(ranges.parse('22+, A2+')) == 13 * 6 + 12 * 16
+r = ranges.parse('QQ+, AKs, AQo:0.5, KhQh')
+assert len(r) == 18 + 4 + 12 + 1
+assert r[tuple(sorted((card.make('Ad'), card.make('Qc'))))] == 0.5
+for bad in ('AKx', 'KA+', 'AhAh', 'X2'):
+    try:
+        ranges.parse(bad)
+    except ValueError:
+        pass
+    else:
+        assert False, bad
+
+
+def brute(range1, range2, board):
+    """Range against range on a turn board, every matchup and river one by one."""
+    wins = losses = ties = 0.0
+    for river in ranges.remaining_cards(board):
+        full = board + [river]
+        for c1, w1 in range1.items():
+            if set(c1) & set(full):
+                continue
+            r1 = evaluator.evaluate(list(c1), full)
+            for c2, w2 in range2.items():
+                if set(c2) & set(full) or set(c1) & set(c2):
+                    continue
+                r2 = evaluator.evaluate(list(c2), full)
+                w = w1 * w2
+                if r1 < r2:
+                    wins += w
+                elif r1 > r2:
+                    losses += w
+                else:
+                    ties += w
+    return wins, losses, ties
+
+
+board = [card.make(c) for c in ('Qs', 'Jh', '7h', '2c')]
+for text1, text2 in (('QQ+, AKs, AhQh:0.5', 'JJ, 77, KQ, T9s'), ('AK, A7s', 'QJ:0.3, 88+')):
+    range1, range2 = ranges.parse(text1), ranges.parse(text2)
+    wins, losses, ties = brute(range1, range2, board)
+    result = ranges.equity(range1, range2, board)
+    total = wins + losses + ties
+    assert abs(result.trials - total) < 1e-6, (result.trials, total)
+    assert abs(result.wins[0] - wins) < 1e-6 and abs(result.wins[1] - losses) < 1e-6
+    assert abs(result.ties[0] - ties) < 1e-6
+    assert abs(result.equity[0] - (wins + ties / 2) / total) < 1e-9
+    assert abs(sum(result.equity) - 1) < 1e-9
+
+print("all done")
@@ -0,0 +1,59 @@
+import asyncio
+import random
+from treys import card, server
+from treys.evaluator import Evaluator
+
+evaluator = Evaluator()
+rng = random.Random(21)
+
+
+async def expect_error(awaitable, kind):
+    try:
+        await asyncio.wait_for(awaitable, 5)
+    except kind as e:
+        return e
+    assert False, "expected %s" % kind.__name__
+
+
+async def main():
+    srv = server.EvaluationServer(latency=0.005)
+    host, port = await srv.start()
+    client = await server.Client.connect(host, port)
+
+    # many requests of every size in flight at once, batched together
+    requests = [[rng.sample(card.FULL_DECK, n) for _ in range(rng.randrange(1, 200))]
+                for n in (5, 6, 7) for _ in range(10)]
+    results = await asyncio.wait_for(asyncio.gather(*(client.evaluate(r) for r in requests)), 30)
+    for hands, ranks in zip(requests, results):
+        assert ranks == [evaluator.evaluate(h[:2], h[2:]) for h in hands]
+    assert srv.requests == len(requests) and srv.batches < len(requests)
+
+    # a bad request fails alone, and the connection carries on
+    good = [rng.sample(card.FULL_DECK, 7) for _ in range(5)]
+    bad = good[:2] + [[good[0][0]] * 7]
+    outcomes = await asyncio.gather(client.evaluate(good), client.evaluate(bad), return_exceptions=True)
+    assert outcomes[0] == [evaluator.evaluate(h[:2], h[2:]) for h in good]
+    assert isinstance(outcomes[1], ValueError) and 'duplicate cards in hand 2' in str(outcomes[1])
+    try:
+        server.encode_request(1, [good[0][:6], good[1][:5], good[2]])
+    except ValueError:
+        pass
+    else:
+        assert False
+
+    await client.close()
+    await srv.close()
+
+    # after the server goes, requests fail rather than hang
+    srv = server.EvaluationServer()
+    host, port = await srv.start()
+    client = await server.Client.connect(host, port)
+    assert await client.evaluate(good) == outcomes[0]
+    await srv.close()
+    await expect_error(client.evaluate(good), ConnectionError)
+    await expect_error(client.evaluate(good), ConnectionError)
+    await client.close()
+
+
+asyncio.run(main())
+print("all done")
@@ -0,0 +1,54 @@
+import random
+from treys import card
+from treys.evaluator import Evaluator
+from treys.showdown import resolve, settle
+
+evaluator = Evaluator()
+rng = random.Random(7)
+royal = [card.make(c) for c in ('Ah', 'Kh', 'Qh', 'Jh', 'Th')]
+T, N = 2000, 6
+boards, hands, contributions, folded = [], [], [], []
+for t in range(T):
+    if t % 4 == 0:
+        # the board plays, so every live player ties, and chips go odd
+        deck = [c for c in card.FULL_DECK if c not in royal]
+        rng.shuffle(deck)
+        board, rest = royal, deck
+    else:
+        deck = rng.sample(card.FULL_DECK, 5 + 2 * N)
+        board, rest = deck[:5], deck[5:]
+    boards.append(board)
+    hands.append([rest[2 * i:2 * i + 2] for i in range(N)])
+    # few distinct amounts, so levels repeat, and odd ones
+    contributions.append([rng.choice((0, 7, 10, 10, 25, 25, 33, 100)) for _ in range(N)])
+    out = [rng.random() < 0.3 for _ in range(N)]
+    if all(out):
+        out[rng.randrange(N)] = False
+    folded.append(out)
+
+ranks, shares = settle(boards, hands, contributions, folded)
+odd = 0
+for t in range(T):
+    result = resolve(boards[t], hands[t], contributions[t], [i for i in range(N) if folded[t][i]])
+    assert [int(r) for r in ranks[t]] == result.ranks, t
+    assert [evaluator.evaluate(h, boards[t]) for h in hands[t]] == result.ranks, t
+    assert [int(s) for s in shares[t]] == result.shares, (t, list(shares[t]), result.shares)
+    assert sum(result.shares) == sum(contributions[t]), t
+    assert sum(amount for amount, _, _ in result.pots) == sum(contributions[t]), t
+    for p in range(N):
+        if folded[t][p]:
+            assert result.shares[p] == 0, t
+    odd += any(amount % len(winners) for amount, _, winners in result.pots)
+assert odd, "no odd chips were dealt with"
+
+# float contributions split evenly instead
+_, fshares = settle(boards, hands, [[float(c) for c in row] for row in contributions], folded)
+for t in range(T):
+    assert abs(sum(fshares[t]) - sum(contributions[t])) < 1e-6, t
+
+# by default each player puts in 1
+_, unit = settle(boards[:50], hands[:50])
+for t in range(50):
+    assert [int(s) for s in unit[t]] == resolve(boards[t], hands[t], [1] * N).shares, t
+
+print("all done")
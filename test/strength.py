@@ -0,0 +1,68 @@
+import itertools
+from treys import card, ranges, suits
+from treys.equity import remaining_cards
+from treys.evaluator import Evaluator
+from treys.strength import StrengthEngine, strength
+
+evaluator = Evaluator('direct')
+AHEAD, TIED, BEHIND = 0, 1, 2
+
+
+def naive(hand, board, opponent=None):
+    """HS, PPOT and NPOT by the triple loop, as in Billings et al."""
+    deck = remaining_cards(hand, board)
+    if opponent is None:
+        opponent = {c: 1.0 for c in itertools.combinations(deck, 2)}
+    hp = [[0.0] * 3 for _ in range(3)]
+    total = [0.0] * 3
+    mine = evaluator.evaluate(hand, board)
+    for combo, w in opponent.items():
+        if set(combo) & set(hand + board):
+            continue
+        theirs = evaluator.evaluate(list(combo), board)
+        now = AHEAD if mine < theirs else TIED if mine == theirs else BEHIND
+        total[now] += w
+        for runout in itertools.combinations([c for c in deck if c not in combo], 5 - len(board)):
+            full = board + list(runout)
+            a, b = evaluator.evaluate(hand, full), evaluator.evaluate(list(combo), full)
+            hp[now][AHEAD if a < b else TIED if a == b else BEHIND] += w
+    hs = (total[AHEAD] + total[TIED] / 2) / sum(total)
+    if len(board) == 5:
+        return hs, 0.0, 0.0
+    sums = [sum(row) for row in hp]
+    down = sums[BEHIND] + sums[TIED] / 2
+    up = sums[AHEAD] + sums[TIED] / 2
+    ppot = (hp[BEHIND][AHEAD] + hp[BEHIND][TIED] / 2 + hp[TIED][AHEAD] / 2) / down if down else 0.0
+    npot = (hp[AHEAD][BEHIND] + hp[TIED][BEHIND] / 2 + hp[AHEAD][TIED] / 2) / up if up else 0.0
+    return hs, ppot, npot
+
+
+def close(result, expected):
+    return all(abs(a - b) < 1e-9 for a, b in zip((result.hs, result.ppot, result.npot), expected))
+
+
+spots = [('Ah Kh', '2h 7h Jc 3d'), ('Qs Qd', 'Ks 9c 4d 4h'), ('7c 6c', '8c 9d 2s Kc'),
+         ('Ah Kh', '2h 7h Jc 3d Ts'), ('5d 5c', 'As Ks Qs 5h 2c')]
+for hand, board in spots:
+    hand = [card.make(c) for c in hand.split()]
+    board = [card.make(c) for c in board.split()]
+    assert close(strength(hand, board), naive(hand, board)), (hand, board)
+    opponent = ranges.parse('QQ+, AK, T9s, 88:0.5, KhQh')
+    assert close(strength(hand, board, opponent), naive(hand, board, opponent))
+
+# the flop, exact by default: 1081 runouts, and the same for the same
+# hand with its suits relabelled, from the cache
+engine = StrengthEngine()
+hand = [card.make(c) for c in ('Ah', 'Kh')]
+flop = [card.make(c) for c in ('2h', '7h', 'Jc')]
+result = engine.strength(hand, flop)
+assert result.runouts == 1081
+narrow = ranges.parse('QQ+, AK, JTs')
+assert close(strength(hand, flop, narrow), naive(hand, flop, narrow))
+other = engine.strength(suits.permute(hand, 7), suits.permute(flop, 7))
+assert other is result and engine.hits == 1
+# sampling is still there, and leaves the current strength alone
+sampled = strength(hand, flop, samples=200, seed=1)
+assert sampled.runouts == 200 and abs(sampled.hs - result.hs) < 1e-12
+
+print("all done")
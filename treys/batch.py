@@ -0,0 +1,98 @@
+"""
+Batch evaluation: ranks for many hands in a single call.
+
+The hands come in as an (N, 5), (N, 6) or (N, 7) array of cards in the
+usual integer form (as minted by card.make), and the ranks go out as an
+array of length N.  The tables are those of the direct engine (see the
+direct module), so each hand takes one lookup, whatever its size.  When
+numpy is available that's vectorized over all rows at once: the packed
+suit counts give the flush suit (if any) of every row, and from there
+either its rankbits index the flush table, or its prime product is found
+in the sorted unsuited keys with a single binary search.  Otherwise we fall
+back to direct.evaluate, row by row, which gives the very same ranks.
+"""
+from . import direct
+
+# numpy, once _load_numpy() has been called: it takes several times longer
+# to import than the rest of the package, so we put it off until a batch
+# actually needs it.  None if it isn't available.
+numpy = None
+_numpy_loaded = False
+
+
+def _load_numpy():
+    global numpy, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_loaded = True
+    return numpy
+
+
+# Rows are processed in chunks of this size, so that the temporaries
+# of the vectorized path stay within a sane memory footprint.
+CHUNKSIZE = 1 << 16
+
+SIZES = (5, 6, 7)
+
+
+class BatchTables(object):
+    """
+    The tables of a DirectTable, recast into the flat forms the vectorized
+    path needs: the suit increments and flush suits as arrays indexed by
+    suit nibble and packed suit counts, the flush ranks as a dense array
+    indexed by rankbits, and the unsuited ranks as a pair of parallel
+    arrays (sorted by prime product) which we can binary-search in bulk.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        if _load_numpy() is not None:
+            keys = sorted(table.unsuited)
+            self.np_suit_inc = numpy.array(direct.SUIT_INC, dtype=numpy.int64)
+            self.np_flush_suit = numpy.array(direct.FLUSH_SUIT, dtype=numpy.int64)
+            self.np_flush = numpy.array(table.flush, dtype=numpy.int32)
+            self.np_keys = numpy.array(keys, dtype=numpy.int64)
+            self.np_values = numpy.array([table.unsuited[k] for k in keys], dtype=numpy.int32)
+
+
+def evaluate(tables, cards, chunksize=CHUNKSIZE):
+    """
+    Evaluates every row of :cards, returning an array of ranks (a numpy
+    array if numpy is available, or a plain list if not).
+    """
+    if _load_numpy() is None:
+        return _evaluate_python(tables, cards)
+    cards = numpy.asarray(cards, dtype=numpy.int64)
+    if cards.ndim != 2 or cards.shape[1] not in SIZES:
+        raise ValueError("need an (N, 5), (N, 6) or (N, 7) array of cards")
+    ranks = numpy.empty(cards.shape[0], dtype=numpy.int32)
+    for start in range(0, cards.shape[0], chunksize):
+        stop = start + chunksize
+        ranks[start:stop] = _evaluate_chunk(tables, cards[start:stop])
+    return ranks
+
+
+def _evaluate_chunk(tables, cards):
+    """Vectorized evaluation of a single chunk of rows."""
+    counts = tables.np_suit_inc[(cards >> 12) & 0xF].sum(axis=1)
+    suit = tables.np_flush_suit[counts]
+    # the rankbits of the flush suit, for the rows which have one
+    bits = numpy.bitwise_or.reduce(numpy.where(cards & suit[:, None], cards >> 16, 0), axis=1)
+    product = numpy.prod(cards & 0xFF, axis=1)
+    index = numpy.minimum(numpy.searchsorted(tables.np_keys, product), len(tables.np_keys) - 1)
+    return numpy.where(suit != 0, tables.np_flush[bits], tables.np_values[index])
+
+
+def _evaluate_python(tables, cards):
+    """Pure-Python fallback, for when numpy isn't around."""
+    table = tables.table
+    evaluate = direct.evaluate
+    ranks = []
+    for row in cards:
+        if len(row) not in SIZES:
+            raise ValueError("need rows of 5, 6 or 7 cards")
+        ranks.append(evaluate(table, row))
+    return ranks
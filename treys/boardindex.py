@@ -0,0 +1,78 @@
+"""
+Boards up to relabelling of the suits: a dense index of the classes of
+flops, turns and rivers, so that anything which depends on the board only
+up to suits (combo rankings, equity tables, hand-strength histograms) can
+be worked out once per class and kept in an array.
+
+                   boards     classes
+    flop (3)       22,100       1,755
+    turn (4)      270,725      16,432
+    river (5)   2,598,960     134,459
+
+The class of a board is given by its key, suits.canonical_key (the rankbits
+of its suits, sorted and packed), and its representative is the canonical
+form of suits.canonical.  The classes are listed in the order
+suits.runout_classes() deals them, one board per class with no
+canonicalizing, along with the number of boards in each class (its
+multiplicity); the index of a board is then a dict lookup by its key.
+"""
+from array import array
+from . import suits
+from .masks import CARDS
+
+SIZES = (3, 4, 5)
+
+# The BoardIndex for each size, built on first use.
+_shared = {}
+
+
+class BoardIndex(object):
+    """
+    The classes of boards of :size (3 to 5) cards:
+
+      boards:        the representative of each class, as a sorted tuple of cards
+      multiplicity:  the number of boards in each class, as an array('I')
+      keys:          dict, suits.canonical_key => index of the class
+    """
+
+    def __init__(self, size):
+        if size not in SIZES:
+            raise ValueError("boards have 3, 4 or 5 cards")
+        self.size = size
+        self.boards = []
+        self.multiplicity = array('I')
+        self.keys = {}
+        for masks, _, weight in suits.runout_classes(size):
+            board = tuple(sorted(CARDS[13 * s + r] for s in range(4)
+                                 for r in range(13) if masks[s] & (1 << r)))
+            self.keys[suits.canonical_key(board)] = len(self.boards)
+            self.boards.append(board)
+            self.multiplicity.append(weight)
+
+    def __len__(self):
+        return len(self.boards)
+
+    def index(self, board):
+        """The index of the class of :board, which must have :size distinct cards."""
+        if len(board) != self.size or len(set(board)) != self.size:
+            raise ValueError("need a board of %d distinct cards" % self.size)
+        return self.keys[suits.canonical_key(board)]
+
+    def tabulate(self, func):
+        """
+        Returns [func(board) for each representative board], for looking up
+        by index() later.
+        """
+        return [func(list(board)) for board in self.boards]
+
+
+def shared_index(size):
+    """Returns the BoardIndex for boards of :size cards, built on the first call and reused from then on."""
+    if size not in _shared:
+        _shared[size] = BoardIndex(size)
+    return _shared[size]
+
+
+def board_index(board):
+    """The index of the class of a board of 3 to 5 cards, among those of its size."""
+    return shared_index(len(board)).index(board)
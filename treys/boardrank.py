@@ -0,0 +1,178 @@
+"""
+Whole-board rankings: the strength of every possible hole-card combo on a
+given 5-card board, all in one pass.
+
+The pass goes by ranks first.  Without a flush, a combo's rank depends only
+on the ranks of its two cards, so we look up the 91 possible pairs of ranks
+once each against the board, and most combos are then a single list lookup;
+only combos which make a flush (with a suit already on the board 3 or more
+times) need a flush lookup of their own.
+
+Rankings are cached by the class of the board under relabelling of the
+suits (its suits.canonical_key, as in the boardindex module), computed for
+the class's canonical form, since isomorphic boards have rankings
+which are the same up to relabelling the combos.  The cache (BoardRanker)
+is bounded, with least-recently-used eviction.
+"""
+import itertools
+from array import array
+from collections import OrderedDict
+from . import card
+from . import direct
+from . import suits
+
+# All 1326 combos of two cards, as sorted tuples, in a fixed order;
+# and the index of each one in that order.
+COMBOS = tuple(tuple(sorted(c)) for c in itertools.combinations(card.FULL_DECK, 2))
+COMBO_INDEX = {c: i for i, c in enumerate(COMBOS)}
+
+# For each suit permutation (by index), the index of the image of each combo.
+_combo_maps = {}
+
+
+def combo_index(hand):
+    """Returns the index of a two-card hand (in either order) among COMBOS."""
+    a, b = hand
+    return COMBO_INDEX[(a, b) if a < b else (b, a)]
+
+
+def _combo_map(perm):
+    if perm not in _combo_maps:
+        m = suits.CARD_MAPS[perm]
+        _combo_maps[perm] = array('H', (combo_index((m[a], m[b])) for a, b in COMBOS))
+    return _combo_maps[perm]
+
+
+def rank_all(board, table=None):
+    """
+    Returns the rank of each of the 1326 COMBOS together with a 5-card board,
+    as an array('H'), with 0 for combos which share a card with the board.
+    """
+    if len(board) != 5 or len(set(board)) != 5:
+        raise ValueError("need a board of 5 distinct cards")
+    if table is None:
+        table = direct.shared_table()
+    flush, unsuited = table.flush, table.unsuited
+
+    product = card.product_from_hand(board)
+    counts = [0] * 13
+    for c in board:
+        counts[card.get_rank_int(c)] += 1
+    bysuit = suits.rankbits_by_suit(board)
+    # the one suit (if any) in which the board has 3 or more cards
+    flushsuit = 0
+    for i, bits in enumerate(bysuit):
+        if bin(bits).count('1') >= 3:
+            flushsuit = card.SUITINTS[i] << 12
+            flushbits = bits
+            flushneed = 5 - bin(bits).count('1')
+
+    pairs = {}
+    for r1 in range(13):
+        for r2 in range(r1, 13):
+            if (counts[r1] <= 2) if r1 == r2 else (counts[r1] < 4 and counts[r2] < 4):
+                pairs[(r1, r2)] = unsuited[product * card.PRIMES[r1] * card.PRIMES[r2]]
+
+    boardset = set(board)
+    ranks = array('H', bytes(2 * len(COMBOS)))
+    for i, (a, b) in enumerate(COMBOS):
+        if a in boardset or b in boardset:
+            continue
+        if flushsuit and ((a & flushsuit != 0) + (b & flushsuit != 0)) >= flushneed:
+            bits = flushbits
+            if a & flushsuit:
+                bits |= a >> 16
+            if b & flushsuit:
+                bits |= b >> 16
+            ranks[i] = flush[bits]
+        else:
+            r1, r2 = (a >> 8) & 0xF, (b >> 8) & 0xF
+            ranks[i] = pairs[(r1, r2) if r1 <= r2 else (r2, r1)]
+    return ranks
+
+
+class BoardRanking(object):
+    """
+    The ranking of all combos on one board:
+
+      ranks:        rank of each of COMBOS (0 for those sharing a card with the board)
+      order:        indexes of the live combos, best first
+      percentiles:  for each combo, the fraction of the other live combos it
+                    beats (counting ties as half), or None if not live
+    """
+
+    def __init__(self, board, ranks):
+        self.board = tuple(board)
+        self.ranks = ranks
+        self.order = sorted((i for i, r in enumerate(ranks) if r), key=ranks.__getitem__)
+        self.percentiles = [None] * len(ranks)
+        n = len(self.order)
+        # walk the live combos from worst to best, a run of tied ranks at a time
+        worse = 0
+        j = n
+        while j > 0:
+            k = j
+            while k > 0 and ranks[self.order[k - 1]] == ranks[self.order[j - 1]]:
+                k -= 1
+            tied = j - k
+            p = (worse + 0.5 * (tied - 1)) / (n - 1) if n > 1 else 1.0
+            for i in self.order[k:j]:
+                self.percentiles[i] = p
+            worse += tied
+            j = k
+
+    def __len__(self):
+        return len(self.order)
+
+    def rank(self, hand):
+        """The rank of a two-card hand on this board (0 if it shares a card with it)."""
+        return self.ranks[combo_index(hand)]
+
+    def percentile(self, hand):
+        """The fraction of the other live combos which a two-card hand beats on this board."""
+        return self.percentiles[combo_index(hand)]
+
+    def permuted(self, perm):
+        """Returns this ranking with its suits relabelled by permutation number :perm."""
+        m = _combo_map(suits.INVERSES[perm])
+        ranking = BoardRanking.__new__(BoardRanking)
+        ranking.board = tuple(suits.permute(self.board, perm))
+        ranking.ranks = array('H', (self.ranks[j] for j in m))
+        ranking.percentiles = [self.percentiles[j] for j in m]
+        inverse = _combo_map(perm)
+        ranking.order = [inverse[i] for i in self.order]
+        return ranking
+
+
+class BoardRanker(object):
+    """
+    Computes BoardRankings, keeping the most recent :maxsize of them (one
+    per class of boards, as in the boardindex module) in a
+    least-recently-used cache.
+    """
+
+    def __init__(self, maxsize=256, table=None):
+        self.maxsize = maxsize
+        self.table = table if table is not None else direct.shared_table()
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def ranking(self, board):
+        """Returns the BoardRanking for a 5-card board."""
+        (canon,), perm = suits.canonical(board)
+        # keyed by class, as in the boardindex module
+        key = suits.canonical_key(canon)
+        ranking = self.cache.get(key)
+        if ranking is None:
+            self.misses += 1
+            ranking = BoardRanking(canon, rank_all(canon, self.table))
+            self.cache[key] = ranking
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        if perm:
+            ranking = ranking.permuted(suits.INVERSES[perm])
+        return ranking
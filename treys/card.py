@@ -65,6 +65,9 @@ def genseq():
         for s in CHAR_SUIT_TO_INT_SUIT.keys():
             yield make(r+s)
 
+# A full deck, in (rank,suit) order, minted once.
+FULL_DECK = tuple(genseq())
+
 _suit2char = 'xshxdxxxc'
 def suit2char(suit):
     if suit in SUITINTS:
@@ -151,12 +154,14 @@ def _resolve_colored():
     except ImportError:
         pass
 
+# Resolved once, at import, rather than retrying the import for every card.
+_colored = _resolve_colored()
+
 def _pretty_card(card):
     """Expects a card in integer form, and returns a nice string for pretty-printing."""
     suit = get_suit_int(card)
     rank = get_rank_int(card)
     s = PRETTY[suit]
-    _colored = _resolve_colored()
     if _colored and suit in REDS:
         s = _colored(s, "red")
     r = RANKS[rank]
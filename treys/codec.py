@@ -0,0 +1,98 @@
+"""
+Bulk card codecs: many cards to and from their two-character strings
+("Ah", "Td", ...) in one call, rather than through card.make and
+card.int_to_str one card at a time.
+
+Cards come in as compact strings with no separators ("AhKdQs..."), and go
+out as array('I') of cards in the usual integer form (zero-copy viewable
+with numpy.frombuffer).  Parsing reads the string two bytes at a time as
+16-bit codes, and maps each code through a table built once, in which every
+code but those of the 52 cards maps to 0; so the whole string goes through
+C-level loops (or a single numpy take, when numpy is available), and one
+scan for 0 afterwards catches anything which isn't a card.
+"""
+from array import array
+from . import card
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# card (integer form) => its string, and the reverse
+CARD_TO_STR = {c: card.int_to_str(c) for c in card.FULL_DECK}
+STR_TO_CARD = {s: c for c, s in CARD_TO_STR.items()}
+
+
+def _code(s):
+    """The 16-bit code of a two-character string, in native byte order."""
+    return array('H', s.encode('ascii'))[0]
+
+# 16-bit code => card, or 0 if the code isn't that of a card
+_BY_CODE = [0] * 65536
+for _s, _c in STR_TO_CARD.items():
+    _BY_CODE[_code(_s)] = _c
+_NP_BY_CODE = numpy.array(_BY_CODE, dtype=numpy.uint32) if numpy is not None else None
+
+
+def parse(text):
+    """
+    Parses a compact string of cards ("AhKdQs...") into an array('I') of
+    cards in integer form.  Raises ValueError on anything which isn't a
+    sequence of valid cards.
+    """
+    try:
+        data = text.encode('ascii')
+    except UnicodeEncodeError:
+        raise ValueError("invalid characters in cards: %r" % text)
+    if len(data) % 2:
+        raise ValueError("odd number of characters in cards: %r" % text)
+    if _NP_BY_CODE is not None:
+        out = array('I', _NP_BY_CODE.take(numpy.frombuffer(data, dtype=numpy.uint16)).tobytes())
+    else:
+        out = array('I', map(_BY_CODE.__getitem__, array('H', data)))
+    if 0 in out:
+        i = out.index(0)
+        raise ValueError("invalid card %r at position %d" % (text[2 * i:2 * i + 2], 2 * i))
+    return out
+
+
+def parse_many(texts, width=None):
+    """
+    Parses a sequence of compact strings of cards (or of single cards) into
+    a single flat array('I'), one after the other.  Each string must hold
+    whole cards; with :width, exactly that many, so that hand i is
+    out[i * width:(i + 1) * width].
+    """
+    if not isinstance(texts, (list, tuple)):
+        texts = list(texts)
+    lengths = set(map(len, texts))
+    if width is not None:
+        if lengths - {2 * width}:
+            bad = next(t for t in texts if len(t) != 2 * width)
+            raise ValueError("expected %d cards, got %r" % (width, bad))
+    elif any(n % 2 for n in lengths):
+        # or else two of them could pair up again in the joined string
+        bad = next(t for t in texts if len(t) % 2)
+        raise ValueError("odd number of characters in cards: %r" % bad)
+    return parse(''.join(texts))
+
+
+def format_cards(cards):
+    """Formats cards in integer form as a compact string ("AhKdQs...")."""
+    try:
+        return ''.join(map(CARD_TO_STR.__getitem__, cards))
+    except KeyError as e:
+        raise ValueError("invalid card int: %r" % e.args[0])
+
+
+def format_many(cards, width):
+    """
+    Formats a flat sequence of cards, :width at a time (as from
+    parse_many), returning a list of compact strings.
+    """
+    if len(cards) % width:
+        raise ValueError("%d cards don't split into hands of %d" % (len(cards), width))
+    text = format_cards(cards)
+    step = 2 * width
+    return [text[i:i + step] for i in range(0, len(text), step)]
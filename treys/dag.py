@@ -0,0 +1,190 @@
+"""
+A card-by-card state table, in the style of the "two plus two" evaluator.
+
+Each state is a row of 53 entries: one per card (in the order of genseq,
+offset by 1), each holding the offset of the row for the state we move to
+on that card.  Slot 0 of each row holds the rank of the hand so far, once
+it has 5 or more cards; and the rows for 6-card states hold final 7-card
+ranks in place of offsets.  So evaluating 7 cards is just 7 lookups:
+
+    p = ROOT
+    for i in indexes:
+        p = table[p + i]
+
+and the rank of 5 or 6 cards is one more lookup, table[p].  Since partial
+states are just offsets, they can be kept and reused: the state after the
+flop (or turn) costs nothing to branch from.
+
+A state doesn't remember every card, only the multiset of ranks, plus the
+ranks in each suit which could still go on to make a flush.  That keeps the
+table to 612,978 rows (some 130Mb), which we build once from the
+LookupTable ranks, save to disk, and from then on map into memory with
+mmap; so that many worker processes can share one physical copy.
+
+As with Evaluator.evaluate, there is no input validation: the cards are
+expected to be distinct.
+"""
+import os
+import mmap
+import struct
+from array import array
+from . import card
+from .lookup import LookupTable
+from .direct import DirectTable
+from .util.io import cache_path, check_header, pack_header, replace_file
+
+MAGIC = b'TREYSDAG'
+VERSION = 1
+# magic, version, byte-order mark, number of rows
+HEADER = struct.Struct('=8sIII')
+
+WIDTH = 53
+ROOT = WIDTH
+
+# Card (in integer form) => column in a row of the table.
+INDEX = {c: i + 1 for i, c in enumerate(card.genseq())}
+
+DEFAULT_PATH = cache_path('dag-v%d.bin' % VERSION)
+
+# The field value for a suit which can no longer make a flush.
+_DEAD = 1 << 13
+_POP = [bin(b).count('1') for b in range(_DEAD + 1)]
+
+
+def generate(lookup=None):
+    """
+    Generates the state table from scratch, returning it as an array('I').
+    This is pure Python and takes a minute or two; see save() and load().
+    """
+    if lookup is None:
+        lookup = LookupTable()
+    direct = DirectTable(lookup)
+    flush, unsuited = direct.flush, direct.unsuited
+    primes = card.PRIMES
+    quads = [p**4 for p in primes]
+    cards = [(r, s) for r in range(13) for s in range(4)]
+
+    # A state is keyed by the prime product of its ranks, and the rankbits
+    # of each suit (or _DEAD), packed into 14-bit fields.
+    table = array('I', bytes(4 * WIDTH))
+    level = {(1, 0): 0}
+    base = 1
+    for k in range(7):
+        nextbase = base + len(level)
+        nextlevel = {}
+        need = 5 - (7 - (k + 1))
+        for product, packed in level:
+            fields = [(packed >> (14 * s)) & 0x3FFF for s in range(4)]
+            row = [0] * WIDTH
+            if k >= 5:
+                row[0] = _rank(product, fields, flush, unsuited)
+            stay = [f if f != _DEAD and _POP[f] >= need else _DEAD for f in fields]
+            staypacked = sum(f << (14 * s) for s, f in enumerate(stay))
+            for i, (r, s) in enumerate(cards, 1):
+                if product % quads[r] == 0:
+                    continue
+                f = fields[s]
+                if f != _DEAD:
+                    if f & (1 << r):
+                        continue
+                    f |= 1 << r
+                    if _POP[f] < need:
+                        f = _DEAD
+                nextproduct = product * primes[r]
+                if k == 6:
+                    row[i] = _final(nextproduct, fields, s, f, flush, unsuited)
+                    continue
+                key = (nextproduct, staypacked ^ ((stay[s] ^ f) << (14 * s)))
+                j = nextlevel.get(key)
+                if j is None:
+                    j = nextlevel[key] = len(nextlevel)
+                row[i] = (nextbase + j) * WIDTH
+            table.extend(row)
+        level = nextlevel
+        base = nextbase
+    return table
+
+
+def _rank(product, fields, flush, unsuited):
+    """The rank of a state with 5 or 6 cards."""
+    for f in fields:
+        if f != _DEAD and _POP[f] >= 5:
+            return flush[f]
+    return unsuited[product]
+
+
+def _final(product, fields, s, f, flush, unsuited):
+    """The rank of a 7-card hand: a 6-card state (:fields) plus one card of suit :s."""
+    if f != _DEAD and _POP[f] >= 5:
+        return flush[f]
+    for t, g in enumerate(fields):
+        if t != s and g != _DEAD and _POP[g] >= 5:
+            return flush[g]
+    return unsuited[product]
+
+
+def save(table, path):
+    """
+    Writes a state table to :path, by way of a temporary file, so that
+    concurrent readers never see a partial table.
+    """
+    header = pack_header(HEADER, MAGIC, VERSION, len(table) // WIDTH)
+    replace_file(path, [header, memoryview(table)])
+
+
+class StateTable(object):
+    """
+    A state table, mapped (read-only) into memory from a file.  Use the
+    load() function, rather than instantiating this directly, to have the
+    file generated on first use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        rows, = check_header(HEADER, self._mmap, MAGIC, VERSION, 'state table', path)
+        self.table = memoryview(self._mmap)[HEADER.size:].cast('I')
+        if len(self.table) != rows * WIDTH:
+            raise ValueError("state table is truncated: %s" % path)
+
+    def close(self):
+        self.table.release()
+        self._mmap.close()
+
+    def step(self, state, c):
+        """Returns the state after adding card :c (in integer form) to :state."""
+        return self.table[state + INDEX[c]]
+
+    def state(self, cards, state=ROOT):
+        """Returns the state after adding :cards to :state (the empty hand by default)."""
+        table = self.table
+        for c in cards:
+            state = table[state + INDEX[c]]
+        return state
+
+    def rank(self, state):
+        """Returns the rank of a 5- or 6-card state."""
+        return self.table[state]
+
+    def evaluate(self, cards):
+        """Evaluates 5, 6 or 7 cards in integer form."""
+        table = self.table
+        p = ROOT
+        for c in cards:
+            p = table[p + INDEX[c]]
+        if len(cards) < 7:
+            p = table[p]
+        return p
+
+
+def load(path=None):
+    """
+    Opens the state table at :path (or DEFAULT_PATH), generating and
+    saving it first if it doesn't exist yet.
+    """
+    if path is None:
+        path = DEFAULT_PATH
+    if not os.path.exists(path):
+        save(generate(), path)
+    return StateTable(path)
@@ -1,5 +1,7 @@
+import random
+from array import array
 from random import shuffle
-from .card import pretty, genseq
+from .card import pretty, FULL_DECK
 
 class Deck:
     """
@@ -36,5 +38,82 @@ class Deck:
     @staticmethod
     def fresh():
         """Returns the card sequence corresponding to a freshly a newly minted deck, in canonical order."""
-        return list(genseq())
+        return list(FULL_DECK)
 
+
+
+def substream_seed(seed, index):
+    """
+    Returns the seed for random stream number :index split off from :seed;
+    streams split off from different indexes (or seeds) are independent.
+    """
+    return '%s:%d' % (seed, index)
+
+
+class Dealer:
+    """
+    Deals many independent deals at once, straight into a flat array of
+    card ints: for each deal, the 5 board cards (starting with the fixed
+    partial :board, if any), then the :hole cards of each of :hands players.
+    Cards in :board and :dead are never dealt.
+
+    Deals are drawn with a partial Fisher-Yates shuffle of a single working
+    list of the live cards, so nothing is re-minted or reallocated per deal.
+    With a :seed the deals are reproducible, and split() hands out dealers
+    with independent, equally reproducible streams, say one per worker.
+    """
+
+    def __init__(self, hands=2, hole=2, board=(), dead=(), seed=None):
+        board = list(board)
+        known = board + list(dead)
+        if len(set(known)) != len(known):
+            raise ValueError("duplicate cards among board and dead cards")
+        if len(board) > 5:
+            raise ValueError("the board has at most 5 cards")
+        self.hands = hands
+        self.hole = hole
+        self.board = board
+        self.dead = list(dead)
+        self.cards = [c for c in FULL_DECK if c not in set(known)]
+        self.width = 5 + hands * hole
+        self.draws = self.width - len(board)
+        if self.draws > len(self.cards):
+            raise ValueError("not enough cards left to deal")
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def split(self, n):
+        """Returns :n new dealers like this one, each with its own stream."""
+        return [Dealer(self.hands, self.hole, self.board, self.dead, substream_seed(self.seed, i))
+                for i in range(n)]
+
+    def deal(self, n, out=None):
+        """
+        Deals :n deals into :out (an array('I') of at least n * width ints,
+        allocated if not given), and returns it.  Deal i occupies
+        out[i * width:(i + 1) * width]; the board comes first, then the hands.
+        """
+        width, draws = self.width, self.draws
+        if out is None:
+            out = array('I', bytes(4 * n * width))
+        elif len(out) < n * width:
+            raise ValueError("output array too small for %d deals" % n)
+        cards = self.cards
+        live = len(cards)
+        board = self.board
+        rand = self.rng.random
+        pos = 0
+        for _ in range(n):
+            for c in board:
+                out[pos] = c
+                pos += 1
+            for j in range(draws):
+                k = j + int(rand() * (live - j))
+                c = cards[k]
+                cards[k] = cards[j]
+                cards[j] = c
+                out[pos] = c
+                pos += 1
+        return out
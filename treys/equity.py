@@ -0,0 +1,298 @@
+"""
+Equity calculations for Texas Hold'em: given the hole cards of 2 to 10
+players, and optionally part of the board and some dead cards, the share
+of the pot each player can expect at showdown.
+
+monte_carlo() samples runouts of the board, in chunks spread across a pool
+of worker processes.  Each chunk draws from its own random stream, derived
+from the seed and the chunk's index, and chunks are tallied in index order;
+so that for a given seed the result doesn't depend on the number of workers
+(or on whether early stopping kicks in while later chunks are in flight).
+
+exact() enumerates every runout instead, or rather one runout out of each
+class of runouts which differ only by swapping interchangeable suits (as
+dealt by suits.runout_classes), weighted by the size of its class.  The work
+is split up by the ranks dealt in the first suit, and spread across worker
+processes.
+"""
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from . import card
+from . import direct
+from . import suits
+from .deck import substream_seed
+
+CHUNKSIZE = 2000
+
+# The number of pieces exact() splits its work into (fixed, so that the
+# result doesn't depend on the number of workers).
+PIECES = 64
+
+class Equity(object):
+    """
+    Tallies for each player, over a number of trials (or, for exact
+    enumeration, a total weight of runouts):
+
+      wins:    trials won outright
+      ties:    trials in which the pot was split
+      shares:  the sum, over trials, of the player's share of the pot
+      squares: the sum of the squares of those shares (for the error)
+    """
+
+    def __init__(self, nplayers, seed=None):
+        self.seed = seed
+        self.trials = 0
+        self.wins = [0] * nplayers
+        self.ties = [0] * nplayers
+        self.shares = [0.0] * nplayers
+        self.squares = [0.0] * nplayers
+
+    def __len__(self):
+        return len(self.wins)
+
+    def __repr__(self):
+        return "Equity(trials=%d, equity=[%s])" % (
+            self.trials, ", ".join("%.4f" % e for e in self.equity))
+
+    def update(self, tally):
+        """Adds in a tally (trials, wins, ties, shares, squares), as returned by a worker."""
+        trials, wins, ties, shares, squares = tally
+        self.trials += trials
+        for i in range(len(self)):
+            self.wins[i] += wins[i]
+            self.ties[i] += ties[i]
+            self.shares[i] += shares[i]
+            self.squares[i] += squares[i]
+
+    @property
+    def win(self):
+        return [w / self.trials for w in self.wins] if self.trials else [0.0] * len(self)
+
+    @property
+    def tie(self):
+        return [t / self.trials for t in self.ties] if self.trials else [0.0] * len(self)
+
+    @property
+    def equity(self):
+        return [s / self.trials for s in self.shares] if self.trials else [0.0] * len(self)
+
+    def stderr(self):
+        """The standard error of each player's equity, as a sample mean over trials."""
+        n = self.trials
+        if n < 2:
+            return [float('inf')] * len(self)
+        return [max(q / n - (s / n) ** 2, 0.0) ** 0.5 / (n - 1) ** 0.5
+                for s, q in zip(self.shares, self.squares)]
+
+    def interval(self, confidence=0.95):
+        """The width of the two-sided confidence interval around each player's equity."""
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+        return [2 * z * e for e in self.stderr()]
+
+
+def remaining_cards(*groups):
+    """
+    Returns the cards of a full deck not in any of the given groups of cards,
+    raising ValueError if the same card turns up twice among them.
+    """
+    known = [c for group in groups for c in group]
+    if len(set(known)) != len(known):
+        raise ValueError("duplicate cards among hands, board and dead cards")
+    known = set(known)
+    return [c for c in card.FULL_DECK if c not in known]
+
+
+def check_hands(hands, board):
+    """Common argument checks for Hold'em hands and board."""
+    if not 2 <= len(hands) <= 10:
+        raise ValueError("need between 2 and 10 hands")
+    for hand in hands:
+        if len(hand) != 2:
+            raise ValueError("each hand needs exactly 2 hole cards")
+    if len(board) > 5:
+        raise ValueError("the board has at most 5 cards")
+
+
+def tally_showdown(ranks, wins, ties, shares, squares, weight=1):
+    """
+    Tallies a single showdown (one rank per player) into the given lists,
+    counting it :weight times.
+    """
+    best = min(ranks)
+    winners = [i for i, r in enumerate(ranks) if r == best]
+    if len(winners) == 1:
+        i = winners[0]
+        wins[i] += weight
+        shares[i] += weight
+        squares[i] += weight
+    else:
+        share = 1.0 / len(winners)
+        for i in winners:
+            ties[i] += weight
+            shares[i] += weight * share
+            squares[i] += weight * share * share
+
+
+def _simulate(args):
+    """
+    Worker: plays out :trials random runouts, drawing from the random stream
+    for chunk :stream, and returns the tally.
+    """
+    hands, board, remaining, trials, seed, stream = args
+    table = direct.shared_table()
+    evaluate = direct.evaluate
+    rng = random.Random(substream_seed(seed, stream))
+    need = 5 - len(board)
+    n = len(hands)
+    wins, ties, shares, squares = [0] * n, [0] * n, [0.0] * n, [0.0] * n
+    for _ in range(trials):
+        full = board + rng.sample(remaining, need)
+        ranks = [evaluate(table, hand + full) for hand in hands]
+        tally_showdown(ranks, wins, ties, shares, squares)
+    return trials, wins, ties, shares, squares
+
+
+def monte_carlo(hands, board=(), dead=(), trials=100000, ci_width=None, confidence=0.95,
+                workers=None, seed=None, progress=None, chunksize=CHUNKSIZE):
+    """
+    Estimates the equity of each hand by sampling up to :trials runouts,
+    returning an Equity.
+
+    With :ci_width, stops early, once the confidence interval around every
+    player's equity is at most that wide.  :workers is the number of worker
+    processes (by default, one per CPU; 0 or 1 to run in this process).  With
+    no :seed, one is chosen at random, and recorded on the result.  If given,
+    :progress is called with the Equity so far after each chunk of trials.
+    """
+    hands = [list(h) for h in hands]
+    board = list(board)
+    check_hands(hands, board)
+    remaining = remaining_cards(board, dead, *hands)
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    result = Equity(len(hands), seed=seed)
+
+    def chunks():
+        stream = 0
+        for start in range(0, trials, chunksize):
+            yield (hands, board, remaining, min(chunksize, trials - start), seed, stream)
+            stream += 1
+
+    def done():
+        return ci_width is not None and max(result.interval(confidence)) <= ci_width
+
+    if workers is not None and workers <= 1:
+        for args in chunks():
+            result.update(_simulate(args))
+            if progress:
+                progress(result)
+            if done():
+                break
+        return result
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        tasks = chunks()
+        # keep a couple of chunks per worker in flight, and tally in order
+        for args in tasks:
+            pending.append(pool.submit(_simulate, args))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result.update(pending.pop(0).result())
+            if progress:
+                progress(result)
+            if done():
+                for future in pending:
+                    future.cancel()
+                break
+            args = next(tasks, None)
+            if args is not None:
+                pending.append(pool.submit(_simulate, args))
+    return result
+
+
+def _exact_setup(hands, board, dead):
+    """
+    Works out what exact() and its workers need to know: the number of
+    cards to come, the suit classes, and the rankbits already dealt in each
+    suit.
+    """
+    need = 5 - len(board)
+    classes = suits.suit_classes(board, dead, *hands)
+    known = suits.rankbits_by_suit(list(board) + list(dead) + [c for h in hands for c in h])
+    return need, classes, known
+
+
+def _enumerate(args):
+    """
+    Worker: enumerates the representative runouts which start with the given
+    rankbits in the first suit, and returns the weighted tally over them.
+    """
+    hands, board, setup, firsts = args
+    table = direct.shared_table()
+    flush, unsuited = table.flush, table.unsuited
+    need, classes, known = setup
+    boardcounts = [bin(b).count('1') for b in suits.rankbits_by_suit(board)]
+    players = []
+    for hand in hands:
+        cards = hand + board
+        product = card.product_from_hand(cards)
+        players.append((product, suits.rankbits_by_suit(cards),
+                        [bin(b).count('1') for b in suits.rankbits_by_suit(cards)]))
+    pop = [bin(b).count('1') for b in range(8192)]
+
+    n = len(hands)
+    trials = 0
+    wins, ties, shares, squares = [0] * n, [0] * n, [0.0] * n, [0.0] * n
+    for masks, product, weight in suits.runout_classes(need, classes, known, firsts):
+        # at most one suit can reach 3 cards on the board, and so a flush
+        fs = -1
+        for s in range(4):
+            if boardcounts[s] + pop[masks[s]] >= 3:
+                fs = s
+                break
+        ranks = []
+        for pproduct, pbits, pcounts in players:
+            if fs >= 0 and pcounts[fs] + pop[masks[fs]] >= 5:
+                ranks.append(flush[pbits[fs] | masks[fs]])
+            else:
+                ranks.append(unsuited[pproduct * product])
+        tally_showdown(ranks, wins, ties, shares, squares, weight)
+        trials += weight
+    return trials, wins, ties, shares, squares
+
+
+def exact(hands, board=(), dead=(), workers=None):
+    """
+    Computes the exact equity of each hand over all runouts of the board,
+    returning an Equity (in which trials is the number of runouts).
+
+    :workers is the number of worker processes (by default, one per CPU;
+    0 or 1 to run in this process).
+    """
+    hands = [list(h) for h in hands]
+    board = list(board)
+    dead = list(dead)
+    check_hands(hands, board)
+    remaining_cards(board, dead, *hands)
+    setup = _exact_setup(hands, board, dead)
+    need, known = setup[0], setup[2]
+    firsts = [bits for combos in suits.suit_options(0x1FFF & ~known[0], need) for bits, _ in combos]
+    tasks = [(hands, board, setup, firsts[i::PIECES]) for i in range(min(PIECES, len(firsts)))]
+
+    result = Equity(len(hands))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for args in tasks:
+            result.update(_enumerate(args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for tally in pool.map(_enumerate, tasks):
+                result.update(tally)
+    return result
@@ -1,6 +1,7 @@
 import itertools
-from .lookup import LookupTable
+from .lookup import LookupTable, CompactLookupTable, load_cached
 from . import card
+from . import direct
 
 class Evaluator(object):
     """
@@ -11,15 +12,54 @@ class Evaluator(object):
     in fact the lookup table generation can be done in under a second and
     consequent evaluations are very fast. Won't beat C, but very fast as
     all calculations are done with bit arithmetic and table lookups.
+
+    The :engine argument selects how 6- and 7-card hands are evaluated:
+
+      'combinations'  - the best of all 5-card subsets (the default)
+      'direct'        - straight from all the cards at once, via the
+                        precomputed tables in the direct module
+      'dag'           - card by card, through the memory-mapped state
+                        table of the dag module (for 5 cards as well)
+
+    All give identical ranks; 'direct' costs a bit more to set up, but
+    is considerably faster per hand.  The 'dag' table is generated (which
+    takes a minute or so) the first time it is used, and cached on disk.
+
+    With compact=True, the lookup tables are kept in the array-backed form
+    of CompactLookupTable rather than as dicts; this gives the same ranks,
+    in a fraction of the memory, and spares _five the prime product of
+    a flush.
     """
 
-    def __init__(self):
-        self.lookup = LookupTable()
+    ENGINES = ('combinations', 'direct', 'dag')
+
+    def __init__(self, engine='combinations', compact=False):
+        if engine not in Evaluator.ENGINES:
+            raise ValueError("invalid engine '%s'" % engine)
+        self.engine = engine
+        self.compact = compact
+        self.lookup = load_cached()
+        if engine == 'direct':
+            self.direct = direct.DirectTable(self.lookup)
+        elif engine == 'dag':
+            from . import dag
+            self.dag = dag.load()
+        if compact:
+            # swap in the array-backed tables, and the _five which goes with
+            # them (which _six and _seven then pick up as well)
+            self.lookup = CompactLookupTable(self.lookup)
+            self._five = self._five_compact
         self.hand_size_map = {
             5 : self._five,
             6 : self._six,
             7 : self._seven
         }
+        if engine == 'direct':
+            self.hand_size_map[6] = self._direct
+            self.hand_size_map[7] = self._direct
+        elif engine == 'dag':
+            self.hand_size_map = dict.fromkeys((5, 6, 7), self.dag.evaluate)
+        self._batch = None
 
     def evaluate(self, cards, board):
         """
@@ -31,6 +71,49 @@ class Evaluator(object):
         all_cards = cards + board
         return self.hand_size_map[len(all_cards)](all_cards)
 
+    def evaluate_batch(self, hands):
+        """
+        Evaluates many hands in one call, given an (N, 5), (N, 6) or (N, 7)
+        array of cards in integer form (one hand per row), and returns the
+        N ranks.  Vectorized if numpy is available; see the batch module.
+        """
+        from . import batch
+        if self._batch is None:
+            table = self.direct if self.engine == 'direct' else direct.shared_table()
+            self._batch = batch.BatchTables(table)
+        return batch.evaluate(self._batch, hands)
+
+    def evaluate_mask(self, mask):
+        """
+        Evaluates a hand of 5 to 7 cards given as a 52-bit mask (see the
+        masks module), so that callers can build hands by OR-ing masks.
+        """
+        from . import masks
+        return masks.evaluate(mask)
+
+    def evaluate_omaha(self, hand, board):
+        """
+        Evaluates an Omaha high hand: the best rank using exactly two of the
+        4 to 6 hole cards in :hand and three of the 3 to 5 cards of :board.
+        See the omaha module; for many hands on one board, an OmahaBoard
+        saves redoing the board's share of the work.
+        """
+        from . import omaha
+        table = self.direct if self.engine == 'direct' else None
+        return omaha.evaluate(hand, board, table)
+
+    def showdown(self, board, hands, contributions=None, folded=()):
+        """
+        Resolves a showdown between :hands on :board, with side pots if
+        :contributions (what each player put in) are given, returning the
+        ranks, rank classes, winners and each player's share as a Showdown.
+        Unlike hand_summary, prints nothing; see the showdown module, which
+        also settles many tables at once.
+        """
+        from . import showdown
+        table = self.direct if self.engine == 'direct' else None
+        return showdown.resolve(board, hands, contributions, folded, table)
+
     def _five(self, cards):
         """
         Performs an evalution given cards in integer form, mapping them to
@@ -48,6 +131,20 @@ class Evaluator(object):
             product = card.product_from_hand(cards)
             return self.lookup.unsuited[product]
 
+    def _five_compact(self, cards):
+        """
+        The same as _five, against the arrays of a CompactLookupTable: flushes
+        are looked up by their rankbits, and everything else by a perfect hash
+        of the prime product.
+        """
+        table = self.lookup
+        if cards[0] & cards[1] & cards[2] & cards[3] & cards[4] & 0xF000:
+            handOR = (cards[0] | cards[1] | cards[2] | cards[3] | cards[4]) >> 16
+            return table.flush_ranks[handOR]
+        else:
+            x = card.product_from_hand(cards) * CompactLookupTable.HASH_MULT & 0xFFFFFFFF
+            return table.unsuited_ranks[(x + table.displace[x >> table.shift]) % table.size]
+
     def _six(self, cards):
         """
         Performs five_card_eval() on all (6 choose 5) = 6 subsets
@@ -76,6 +173,13 @@ class Evaluator(object):
                 minimum = score
         return minimum
 
+    def _direct(self, cards):
+        """
+        Evaluates 6 or 7 cards in a single pass, with no 5-card subsets;
+        see the direct module for the details.
+        """
+        return direct.evaluate(self.direct, cards)
+
     def get_rank_class(self, hr):
         """
         Returns the class of hand given the hand hand_rank
@@ -114,6 +218,15 @@ class Evaluator(object):
         """
         return float(hand_rank) / float(LookupTable.MAX_HIGH_CARD)
 
+    def get_rank_percentile(self, hand_rank, cards=7):
+        """
+        Returns the true percentile of the hand rank among all hands of
+        :cards (5 or 7) cards: the fraction of them it beats, counting ties
+        as half, from the exact frequencies in the frequency module.
+        """
+        from . import frequency
+        return frequency.percentile(hand_rank, cards)
+
     def hand_summary(self, board, hands):
         """
         Gives a summary of the hand with ranks as time proceeds.
@@ -0,0 +1,233 @@
+"""
+Exact frequencies of each rank (1 to 7462) over all hands of 5 or 7 cards,
+and percentiles from them.
+
+Rather than evaluating all C(52, 7) = 133,784,560 hands, we count: for each
+multiset of ranks (at most 4 of each), the number of ways to give its cards
+suits is the product over its ranks of C(4, count).  Of those, the ones
+which make a flush are those in which some suit holds a set F of 5 or more
+distinct ranks; for a given suit and F there are
+
+    product over ranks r in F of C(3, count(r) - 1)
+        * product over other ranks of C(3, count(r))
+
+of them (the other cards of each rank taking any of the other three suits),
+and with at most 7 cards there is only ever one such suit, which can be any
+of the four.  These have the flush rank of F; all the rest have the unsuited
+rank of the multiset.  That's some 50,000 multisets for 7 cards, each with
+at most a few dozen sets F, and takes a second or so.
+
+The counts for 5 and 7 cards ship with the package (see DEFAULT_PATH), and
+can be regenerated, or checked against brute-force enumeration over a
+process pool, from the command line:
+
+    python -m treys.frequency --write treys/data/frequencies.bin
+    python -m treys.frequency --check 5 --workers 8
+"""
+import argparse
+import itertools
+import math
+import os
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from . import card
+from . import direct
+from .lookup import LookupTable
+from .util.io import check_header, pack_header, replace_file
+
+MAGIC = b'TREYSFRQ'
+VERSION = 1
+# magic, version, byte-order mark, number of tables; then for each table,
+# its number of cards (uint32) and the count for each rank 0 to 7462 (uint64)
+HEADER = struct.Struct('=8sIII')
+SIZES = (5, 7)
+RANKS = LookupTable.MAX_HIGH_CARD + 1
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'frequencies.bin')
+
+# Counts and percentiles by number of cards, loaded on first use.
+_counts = {}
+_percentiles = {}
+
+
+def count_ranks(n, table=None):
+    """
+    Returns the number of hands of :n (5 to 7) cards with each rank, as an
+    array('Q') indexed by rank (so entry 0 is always 0), counting as above.
+    """
+    if not 5 <= n <= 7:
+        raise ValueError("can only count hands of 5 to 7 cards")
+    if table is None:
+        table = direct.shared_table()
+    flush, unsuited = table.flush, table.unsuited
+    counts = array('Q', bytes(8 * RANKS))
+    for ranks in itertools.combinations_with_replacement(range(13), n):
+        multiplicity = {}
+        for r in ranks:
+            multiplicity[r] = multiplicity.get(r, 0) + 1
+        if max(multiplicity.values()) > 4:
+            continue
+        total = 1
+        product = 1
+        for r, c in multiplicity.items():
+            total *= math.comb(4, c)
+            product *= card.PRIMES[r] ** c
+        distinct = sorted(multiplicity)
+        flushes = 0
+        for k in range(5, len(distinct) + 1):
+            for chosen in itertools.combinations(distinct, k):
+                ways = 4
+                bits = 0
+                for r, c in multiplicity.items():
+                    if r in chosen:
+                        ways *= math.comb(3, c - 1)
+                        bits |= 1 << r
+                    else:
+                        ways *= math.comb(3, c)
+                if ways:
+                    counts[flush[bits]] += ways
+                    flushes += ways
+        counts[unsuited[product]] += total - flushes
+    return counts
+
+
+def class_counts(counts):
+    """Sums rank counts into counts by rank class (1 to 9), as a dict."""
+    result = {}
+    rank = 1
+    for top in sorted(LookupTable.MAX_TO_RANK_CLASS):
+        cls = LookupTable.MAX_TO_RANK_CLASS[top]
+        result[cls] = sum(counts[rank:top + 1])
+        rank = top + 1
+    return result
+
+
+def save(tables, path):
+    """Writes counts (a dict mapping number of cards to counts by rank) to :path."""
+    parts = [pack_header(HEADER, MAGIC, VERSION, len(tables))]
+    for n in sorted(tables):
+        parts.append(struct.pack('=I', n))
+        parts.append(array('Q', tables[n]).tobytes())
+    replace_file(path, parts)
+
+
+def load(path=None):
+    """
+    Reads counts saved by save() from :path (or DEFAULT_PATH), returning a
+    dict mapping the number of cards to counts by rank.  Each table must sum
+    to the number of hands of that many cards.
+    """
+    if path is None:
+        path = DEFAULT_PATH
+    with open(path, 'rb') as f:
+        data = f.read()
+    ntables, = check_header(HEADER, data, MAGIC, VERSION, 'frequency table file', path)
+    tables = {}
+    offset = HEADER.size
+    for _ in range(ntables):
+        if len(data) < offset + 4 + 8 * RANKS:
+            raise ValueError("frequency table file is truncated: %s" % path)
+        n, = struct.unpack_from('=I', data, offset)
+        counts = array('Q')
+        counts.frombytes(data[offset + 4:offset + 4 + 8 * RANKS])
+        if sum(counts) != math.comb(52, n):
+            raise ValueError("frequency table for %d cards is corrupt: %s" % (n, path))
+        tables[n] = counts
+        offset += 4 + 8 * RANKS
+    return tables
+
+
+def counts(n=7):
+    """
+    Returns the counts by rank for hands of :n cards: from the packaged
+    file if it has them, or else counted afresh (see count_ranks).
+    """
+    if n not in _counts:
+        try:
+            _counts.update(load())
+        except (OSError, ValueError):
+            pass
+        if n not in _counts:
+            _counts[n] = count_ranks(n)
+    return _counts[n]
+
+
+def percentile(rank, n=7):
+    """
+    Returns the fraction of all hands of :n cards which a hand of :rank
+    beats, counting those it ties with as half.
+    """
+    if n not in _percentiles:
+        c = counts(n)
+        total = sum(c)
+        result = array('d', bytes(8 * RANKS))
+        worse = 0
+        for r in range(RANKS - 1, 0, -1):
+            result[r] = (worse + c[r] / 2) / total
+            worse += c[r]
+        _percentiles[n] = result
+    return _percentiles[n][rank]
+
+
+def _brute_force_task(args):
+    """Counts the ranks of all :n-card hands whose first two cards (by index) are :i and :j."""
+    n, i, j = args
+    table = direct.shared_table()
+    evaluate = direct.evaluate
+    deck = card.FULL_DECK
+    head = [deck[i], deck[j]]
+    counts = array('Q', bytes(8 * RANKS))
+    for rest in itertools.combinations(deck[j + 1:], n - 2):
+        counts[evaluate(table, head + list(rest))] += 1
+    return counts
+
+
+def brute_force(n, workers=None):
+    """
+    Counts the ranks of all hands of :n cards by evaluating every one of
+    them, split by their first two cards over a pool of :workers processes.
+    Slow (about an hour of CPU time for 7 cards), but independent of
+    count_ranks; for cross-checking it.
+    """
+    tasks = [(n, i, j) for i in range(52) for j in range(i + 1, 52)]
+    counts = array('Q', bytes(8 * RANKS))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_brute_force_task, tasks, chunksize=16):
+            for r, c in enumerate(partial):
+                counts[r] += c
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m treys.frequency',
+        description="Generates (or checks) the exact rank frequencies over all 5- and 7-card hands.")
+    parser.add_argument('--write', metavar='PATH', help="write the counts to this file")
+    parser.add_argument('--check', type=int, metavar='N', choices=(5, 6, 7),
+                        help="check the counts for N cards against brute force")
+    parser.add_argument('--workers', type=int, help="processes for --check (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    tables = {n: count_ranks(n) for n in SIZES}
+    for n, c in sorted(tables.items()):
+        print("%d cards: %d hands" % (n, sum(c)))
+        for cls, total in sorted(class_counts(c).items()):
+            print("  %-16s %12d" % (LookupTable.RANK_CLASS_TO_STRING[cls], total))
+    if args.write:
+        save(tables, args.write)
+    if args.check:
+        expected = tables.get(args.check) or count_ranks(args.check)
+        found = brute_force(args.check, args.workers)
+        bad = [r for r in range(RANKS) if found[r] != expected[r]]
+        if bad:
+            print("MISMATCH for %d cards at %d ranks, first %d: %d counted, %d by brute force" % (
+                args.check, len(bad), bad[0], expected[bad[0]], found[bad[0]]))
+            return 1
+        print("brute force agrees for %d cards" % args.check)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Incremental evaluation: a hand which takes its cards one at a time (hole
+cards, then flop, turn and river), and keeps its best rank up to date as
+it goes.
+
+The state is what the direct engine works from (see the direct module): the
+prime product of the ranks, the packed suit counts, and the rankbits of each
+suit, all packed into plain ints.  So adding a card is a handful of integer
+operations, plus a single table lookup for the new rank; and a copy of the
+state, to branch on each possible next card, is just as cheap.
+"""
+from . import direct
+from .suits import RANKBITS_SHIFT
+
+
+class IncrementalEvaluator(object):
+    """
+    The best rank of a growing set of cards (in integer form), up to 7 of them.
+    The rank is None until there are 5 cards.  As with Evaluator.evaluate,
+    the cards are expected to be distinct; that isn't checked.
+    """
+    __slots__ = ('table', 'cards', 'product', 'suits', 'bits', 'rank')
+
+    def __init__(self, cards=(), table=None):
+        self.table = table if table is not None else direct.shared_table()
+        self.cards = ()
+        self.product = 1
+        self.suits = 0
+        self.bits = 0
+        self.rank = None
+        self.extend(cards)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __repr__(self):
+        return "IncrementalEvaluator(cards=%d, rank=%s)" % (len(self.cards), self.rank)
+
+    def add(self, c):
+        """Adds a single card, updating the rank; returns self, for chaining."""
+        if len(self.cards) >= 7:
+            raise ValueError("can't evaluate more than 7 cards")
+        self.cards += (c,)
+        self.product *= c & 0xFF
+        self.suits += direct.SUIT_INC[(c >> 12) & 0xF]
+        self.bits |= (c >> 16) << RANKBITS_SHIFT[(c >> 12) & 0xF]
+        if len(self.cards) >= 5:
+            suit = direct.FLUSH_SUIT[self.suits]
+            if suit:
+                self.rank = self.table.flush[(self.bits >> RANKBITS_SHIFT[suit >> 12]) & 0x1FFF]
+            else:
+                self.rank = self.table.unsuited[self.product]
+        return self
+
+    def extend(self, cards):
+        """Adds several cards (say, a flop) in turn; returns self."""
+        for c in cards:
+            self.add(c)
+        return self
+
+    def copy(self):
+        """Returns an independent copy of the current state."""
+        other = IncrementalEvaluator.__new__(IncrementalEvaluator)
+        other.table = self.table
+        other.cards = self.cards
+        other.product = self.product
+        other.suits = self.suits
+        other.bits = self.bits
+        other.rank = self.rank
+        return other
+
+    def plus(self, c):
+        """Returns a copy with card :c added, leaving this one as it is."""
+        return self.copy().add(c)
@@ -0,0 +1,221 @@
+"""
+Opt-in instrumentation: counters and latency histograms for evaluation,
+table building and loading, and dealing.
+
+Nothing here is wired in by default.  enable() swaps instrumented versions
+in for a handful of methods (Evaluator.evaluate and evaluate_batch, the
+build and load methods of the tables, Deck.shuffle and Deck.draw), and
+disable() puts the originals back; so while it's off, the hot path is
+exactly what it always was, with no flags to test.
+
+    from treys import instrument
+    instrument.enable()
+    ...
+    print(instrument.snapshot())
+
+What gets recorded, by name:
+
+  evaluate.<engine>.<n>   latency of Evaluator.evaluate on n cards
+  evaluate.<engine>.compact.<n>
+                          the same, for an Evaluator with compact=True
+  evaluate.flush          count of evaluations whose best hand is a
+  evaluate.nonflush         flush or straight flush, and of the rest
+  evaluate_batch          latency per call, and evaluate_batch.rows
+  lookup.build, lookup.load, compact.build, direct.build, dag.load
+                          latency of building or loading each table
+  deck.shuffle, deck.draw latency, and deck.cards (cards drawn)
+
+Latencies are kept in histograms with power-of-two buckets of nanoseconds,
+which is cheap enough to record on every call.
+"""
+import time
+from . import dag
+from . import direct
+from .deck import Deck
+from .evaluator import Evaluator
+from .lookup import LookupTable, CompactLookupTable
+
+_clock = time.perf_counter_ns
+
+# The originals of everything we swap out, while enabled.
+_saved = {}
+_callback = None
+
+
+class Histogram(object):
+    """
+    Counts of observed latencies (in nanoseconds), by power-of-two bucket:
+    bucket i holds those of i bits, so from 2**(i-1) up to 2**i - 1.
+    """
+    __slots__ = ('count', 'total', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.buckets = [0] * 64
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        self.buckets[ns.bit_length()] += 1
+
+    def quantile(self, q):
+        """An upper bound on the :q quantile (0 to 1), to within a factor of 2."""
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return (1 << i) - 1
+        return 0
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total_ns': self.total,
+            'mean_ns': self.total / self.count if self.count else 0.0,
+            'p50_ns': self.quantile(0.5),
+            'p90_ns': self.quantile(0.9),
+            'p99_ns': self.quantile(0.99),
+            'buckets': {(1 << i) - 1: n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class Registry(object):
+    """Named counters and histograms."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, ns):
+        h = self.histograms.get(name)
+        if h is None:
+            h = self.histograms[name] = Histogram()
+        h.add(ns)
+        if _callback is not None:
+            _callback(name, ns)
+
+    def snapshot(self):
+        return {
+            'counters': dict(self.counters),
+            'histograms': {name: h.snapshot() for name, h in self.histograms.items()},
+        }
+
+registry = Registry()
+
+# (engine, compact, number of cards) => histogram name, so we don't format one per call
+_names = {}
+
+_FLUSHES = (range(1, LookupTable.MAX_STRAIGHT_FLUSH + 1),
+            range(LookupTable.MAX_FULL_HOUSE + 1, LookupTable.MAX_FLUSH + 1))
+
+
+def _evaluate(self, cards, board):
+    all_cards = cards + board
+    n = len(all_cards)
+    start = _clock()
+    rank = self.hand_size_map[n](all_cards)
+    elapsed = _clock() - start
+    key = (self.engine, self.compact, n)
+    name = _names.get(key)
+    if name is None:
+        name = _names[key] = 'evaluate.%s.%s%d' % (self.engine, 'compact.' if self.compact else '', n)
+    registry.observe(name, elapsed)
+    if rank in _FLUSHES[0] or rank in _FLUSHES[1]:
+        registry.count('evaluate.flush')
+    else:
+        registry.count('evaluate.nonflush')
+    return rank
+
+
+def _timed(name, f):
+    """Wraps :f to record its latency under :name."""
+    def timed(*args, **kwargs):
+        start = _clock()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            registry.observe(name, _clock() - start)
+    timed.__name__ = f.__name__
+    timed.__doc__ = f.__doc__
+    timed.__wrapped__ = f
+    return timed
+
+
+def _draw(f):
+    timed = _timed('deck.draw', f)
+
+    def draw(self, k):
+        registry.count('deck.cards', k)
+        return timed(self, k)
+    draw.__doc__ = f.__doc__
+    draw.__wrapped__ = f
+    return draw
+
+
+def _batch(f):
+    timed = _timed('evaluate_batch', f)
+
+    def evaluate_batch(self, hands):
+        registry.count('evaluate_batch.rows', len(hands))
+        return timed(self, hands)
+    evaluate_batch.__doc__ = f.__doc__
+    evaluate_batch.__wrapped__ = f
+    return evaluate_batch
+
+
+def _replacements():
+    """(owner, attribute, instrumented version) for everything we swap in."""
+    return [
+        (Evaluator, 'evaluate', _evaluate),
+        (Evaluator, 'evaluate_batch', _batch(Evaluator.evaluate_batch)),
+        (LookupTable, 'build', _timed('lookup.build', LookupTable.build)),
+        (LookupTable, 'load', _timed('lookup.load', LookupTable.load)),
+        (CompactLookupTable, 'build', _timed('compact.build', CompactLookupTable.build)),
+        (direct.DirectTable, 'build', _timed('direct.build', direct.DirectTable.build)),
+        (dag, 'load', _timed('dag.load', dag.load)),
+        (Deck, 'shuffle', _timed('deck.shuffle', Deck.shuffle)),
+        (Deck, 'draw', _draw(Deck.draw)),
+    ]
+
+
+def enable(callback=None):
+    """
+    Turns instrumentation on (if it isn't already).  If given, :callback is
+    called as callback(name, ns) with every latency recorded.
+    """
+    global _callback
+    _callback = callback
+    if _saved:
+        return
+    for owner, attr, instrumented in _replacements():
+        _saved[(owner, attr)] = owner.__dict__[attr]
+        setattr(owner, attr, instrumented)
+
+
+def disable():
+    """Turns instrumentation off, restoring the original methods; what was recorded is kept."""
+    global _callback
+    for (owner, attr), original in _saved.items():
+        setattr(owner, attr, original)
+    _saved.clear()
+    _callback = None
+
+
+def enabled():
+    return bool(_saved)
+
+
+def snapshot():
+    """Returns everything recorded so far, as plain dicts (see Registry.snapshot)."""
+    return registry.snapshot()
+
+
+def reset():
+    """Clears everything recorded so far."""
+    registry.counters.clear()
+    registry.histograms.clear()
@@ -1,6 +1,27 @@
 import itertools
+import hashlib
+import struct
+import zlib
+from array import array
 from collections import OrderedDict
+from collections.abc import Mapping
 from . import card
+from .util.io import cache_path, check_header, pack_header, replace_file
+
+# The binary form of the tables (see LookupTable.save) starts with this header:
+# magic, version, byte-order mark, table sizes, crc32 of the payload, and the
+# sha256 digests of the tables in their CSV form.
+MAGIC = b'TREYSLUT'
+VERSION = 1
+HEADER = struct.Struct('=8sIIIII32s32s')
+
+# The sha256 digests of the reference snapshots, refdata/lookup/*.txt.
+REFDATA_SHA256 = {
+    'flush': '0a63d79fe8d076116c93519e2189b195685ecdf1e37cb53cbfbaab55e11a0d7c',
+    'unsuited': '279c33f6693d1a0828ccd6bf6fcfb6f95a4d09c65b854e61de20ba9c534bed67',
+}
+
+DEFAULT_PATH = cache_path('lookup-v%d.bin' % VERSION)
 
 class LookupTable(object):
     """
@@ -59,8 +80,11 @@ class LookupTable(object):
         9 : "High Card"
     }
 
-    def __init__(self):
-        self.build()
+    def __init__(self, path=None):
+        if path is None:
+            self.build()
+        else:
+            self.load(path)
 
     def build(self):
         """
@@ -71,6 +95,55 @@ class LookupTable(object):
         self.build_flushes()  # this will call straights and high cards method + reuse some of the bit sequences
         self.build_multiples()
 
+    def save(self, path):
+        """
+        Saves the member tables in a compact binary form: a header, then the
+        keys (as uint32) and ranks (as uint16) of each table, in insertion
+        order.  Refuses to save tables which don't match the reference
+        snapshots.
+        """
+        digests = {}
+        for name in ('flush', 'unsuited'):
+            digests[name] = _digest(getattr(self, name))
+            if digests[name].hex() != REFDATA_SHA256[name]:
+                raise ValueError("%s table doesn't match the reference snapshot" % name)
+        payload = b''.join([
+            array('I', self.flush.keys()).tobytes(),
+            array('H', self.flush.values()).tobytes(),
+            array('I', self.unsuited.keys()).tobytes(),
+            array('H', self.unsuited.values()).tobytes(),
+        ])
+        header = pack_header(HEADER, MAGIC, VERSION, len(self.flush), len(self.unsuited),
+                             zlib.crc32(payload), digests['flush'], digests['unsuited'])
+        replace_file(path, [header, payload])
+
+    def load(self, path):
+        """
+        Loads member tables saved by save(), in place of building them.
+        The file is read whole, and its arrays of keys and ranks copied into
+        the tables.  The payload is checked against its crc32, and the
+        digests in the header against the reference snapshots; the tables
+        themselves were hashed when they were saved.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        nflush, nunsuited, crc, flushsum, unsuitedsum = check_header(
+            HEADER, data, MAGIC, VERSION, 'lookup table file', path)
+        payload = memoryview(data)[HEADER.size:]
+        if len(payload) != 6 * (nflush + nunsuited) or zlib.crc32(payload) != crc:
+            raise ValueError("lookup table file is corrupt: %s" % path)
+        if (flushsum.hex() != REFDATA_SHA256['flush'] or
+                unsuitedsum.hex() != REFDATA_SHA256['unsuited']):
+            raise ValueError("lookup table file doesn't match the reference snapshots: %s" % path)
+        tables = []
+        offset = 0
+        for n in (nflush, nunsuited):
+            keys = payload[offset:offset + 4 * n].cast('I')
+            values = payload[offset + 4 * n:offset + 6 * n].cast('H')
+            tables.append(OrderedDict(zip(keys, values)))
+            offset += 6 * n
+        self.flush, self.unsuited = tables
+
     def build_flushes(self):
         """
         Straight flushes and flushes.
@@ -238,6 +311,207 @@ class LookupTable(object):
                 rank += 1
 
 
+def _rank_classes():
+    """Maps each rank (1 to 7462) to its rank class; 0 maps to 0."""
+    classes = [0] * (LookupTable.MAX_HIGH_CARD + 1)
+    rank = 1
+    for top in sorted(LookupTable.MAX_TO_RANK_CLASS):
+        while rank <= top:
+            classes[rank] = LookupTable.MAX_TO_RANK_CLASS[top]
+            rank += 1
+    return classes
+
+# The rank class of each rank, as a list (see LookupTable.MAX_TO_RANK_CLASS).
+RANK_CLASS = _rank_classes()
+
+
+class CompactLookupTable(object):
+    """
+    The same ranks as a LookupTable, in a more compact layout:
+
+      flush_ranks:     array('H') of length 8192, indexed directly by the
+                       13-bit rankbits of a flush (so no prime product needed)
+      unsuited_ranks:  array('H') of length 6175, indexed by a minimal perfect
+                       hash of the prime product (see unsuited_index)
+
+    which comes to some 60Kb, against about 1Mb for the two dicts.  The flush
+    and unsuited members are read-only mappings over these arrays, keyed by
+    prime product as in LookupTable, for code that wants to go by product;
+    but the hot path (Evaluator._five_compact) uses the arrays directly.
+
+    The hash is of the hash-and-displace kind: a multiplicative hash of the
+    product picks both a bucket (its top bits) and a base slot (its value
+    modulo the table size), and each bucket has a displacement, found at
+    build time, which moves all of its keys into free slots.
+    """
+    HASH_MULT = 0x9E3779B1
+
+    def __init__(self, lookup=None):
+        if lookup is None:
+            lookup = LookupTable()
+        self.build(lookup)
+
+    def build(self, lookup):
+        self.flush_ranks = array('H', bytes(2 * 8192))
+        for product, rank in lookup.flush.items():
+            self.flush_ranks[_rankbits_from_product(product)] = rank
+        for bucketbits in (11, 12, 13):
+            if self._build_unsuited(lookup.unsuited, bucketbits):
+                break
+        else:
+            raise RuntimeError("can't find a perfect hash for the unsuited table")
+        self.flush = _FlushView(self)
+        self.unsuited = _UnsuitedView(self)
+
+    def _build_unsuited(self, table, bucketbits):
+        """Tries to place every key of :table with 2**bucketbits buckets; returns True on success."""
+        found = perfect_hash(table, bucketbits)
+        if found is None:
+            return False
+        self.size = len(table)
+        self.shift = 32 - bucketbits
+        self.displace, keys = found
+        self.unsuited_keys = keys
+        self.unsuited_ranks = array('H', (table[k] for k in keys))
+        return True
+
+    def unsuited_index(self, product):
+        """Returns the slot for :product in unsuited_ranks (meaningful only for valid products)."""
+        x = product * CompactLookupTable.HASH_MULT & 0xFFFFFFFF
+        return (x + self.displace[x >> self.shift]) % self.size
+
+
+class _FlushView(Mapping):
+    """The flush ranks of a CompactLookupTable, keyed by prime product."""
+
+    def __init__(self, table):
+        self.ranks = table.flush_ranks
+
+    def __getitem__(self, product):
+        bits = _rankbits_from_product(product)
+        if bits >= len(self.ranks) or not self.ranks[bits]:
+            raise KeyError(product)
+        return self.ranks[bits]
+
+    def __iter__(self):
+        for bits, rank in enumerate(self.ranks):
+            if rank:
+                yield card.product_from_rankbits(bits)
+
+    def __len__(self):
+        return sum(1 for rank in self.ranks if rank)
+
+
+class _UnsuitedView(Mapping):
+    """The unsuited ranks of a CompactLookupTable, keyed by prime product."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, product):
+        i = self.table.unsuited_index(product)
+        if self.table.unsuited_keys[i] != product:
+            raise KeyError(product)
+        return self.table.unsuited_ranks[i]
+
+    def __iter__(self):
+        return iter(self.table.unsuited_keys)
+
+    def __len__(self):
+        return self.table.size
+
+
+def perfect_hash(keys, bucketbits):
+    """
+    Finds a minimal perfect hash for :keys (distinct positive ints), of the
+    hash-and-displace kind used by CompactLookupTable, with 2**bucketbits
+    buckets: key k goes to slot
+
+        x = k * HASH_MULT & 0xFFFFFFFF
+        (x + displace[x >> (32 - bucketbits)]) % len(keys)
+
+    Returns the displacements and the key in each slot, as arrays; or None
+    if there is no such hash with this many buckets.
+    """
+    size = len(keys)
+    shift = 32 - bucketbits
+    buckets = [[] for _ in range(1 << bucketbits)]
+    for k in keys:
+        x = k * CompactLookupTable.HASH_MULT & 0xFFFFFFFF
+        buckets[x >> shift].append((x % size, k))
+    slots = array('Q' if max(keys) >> 32 else 'I', bytes(8 * size))[:size]
+    displace = array('H' if size < 1 << 16 else 'I', bytes(4 << bucketbits))[:1 << bucketbits]
+    free = 0
+    # place the biggest buckets first, while there's the most room
+    for b in sorted(range(len(buckets)), key=lambda b: -len(buckets[b])):
+        bucket = buckets[b]
+        if not bucket:
+            break
+        if len(bucket) == 1:
+            # any free slot will do, so take the next one
+            while slots[free]:
+                free += 1
+            base, k = bucket[0]
+            displace[b] = (free - base) % size
+            slots[free] = k
+            continue
+        if len(set(base for base, _ in bucket)) < len(bucket):
+            return None
+        for d in range(size):
+            for base, _ in bucket:
+                if slots[(base + d) % size]:
+                    break
+            else:
+                break
+        else:
+            return None
+        displace[b] = d
+        for base, k in bucket:
+            slots[(base + d) % size] = k
+    return displace, slots
+
+
+def _rankbits_from_product(product):
+    """
+    The inverse of card.product_from_rankbits, for products of distinct primes;
+    or an out-of-range value (8192 or more) for anything else.
+    """
+    bits = 0
+    for i, p in enumerate(card.PRIMES):
+        if product % p == 0:
+            product //= p
+            bits |= 1 << i
+    return bits if product == 1 else 8192
+
+
+def _digest(table):
+    """The sha256 digest of a table in its CSV form (as written by util.io.write_table)."""
+    h = hashlib.sha256()
+    h.update(''.join('%d,%d\n' % kv for kv in table.items()).encode('ascii'))
+    return h.digest()
+
+
+def load_cached(path=None):
+    """
+    Returns a LookupTable loaded from :path (or DEFAULT_PATH), if possible.
+    Otherwise builds it from scratch, and tries to save it there for next
+    time; failing which (for example on a read-only filesystem) we simply
+    carry on with the freshly built table.
+    """
+    if path is None:
+        path = DEFAULT_PATH
+    try:
+        return LookupTable(path)
+    except (OSError, ValueError):
+        pass
+    table = LookupTable()
+    try:
+        table.save(path)
+    except OSError:
+        pass
+    return table
+
+
 def next_word(bits):
     """
     Gets the so-called "next lexographic bit sequence" from a starting word :bits
@@ -0,0 +1,154 @@
+"""
+Hands as 52-bit masks: one bit per card, so that adding cards is an OR,
+removing dead cards an AND NOT, and testing for overlap an AND.
+
+Bit 13 * s + r stands for the card of rank r (0 for a deuce, 12 for an
+ace) in suit s (the index in card.SUITINTS: spades, hearts, diamonds,
+clubs), so that each suit is a 13-bit slice laid out just like the
+rankbits of a card.
+
+Evaluating a mask needs neither the cards nor their primes:
+
+  - a flush (with at most 7 cards, there's only ever one suit with 5 or
+    more) is looked up by the rankbits of its suit, which are just its
+    slice of the mask;
+  - anything else depends only on how many of each rank there are, and
+    from the four slices we get, with a handful of bitwise operations,
+    the ranks with at least 1, 2, 3 and 4 cards; packed together these
+    make a key (the rank-count index) for a dict of ranks.
+
+The tables come from those of the direct engine, so the ranks are the
+usual LookupTable ranks, for 5 to 7 cards.
+"""
+from array import array
+from . import card
+from . import direct
+from .suits import SUIT_INDEX
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+FULL = (1 << 52) - 1
+
+# Card (in integer form) => its bit; and the card for each bit index.
+BIT = {}
+for _c in card.FULL_DECK:
+    BIT[_c] = 1 << (13 * card.SUITINTS.index(card.get_suit_int(_c)) + card.get_rank_int(_c))
+CARDS = tuple(sorted(card.FULL_DECK, key=BIT.__getitem__))
+
+_POP = [bin(b).count('1') for b in range(8192)]
+
+# The MaskTable for the current process, built on first use.
+_shared = None
+
+
+def from_cards(cards):
+    """Returns the mask of :cards (in integer form), which must be distinct."""
+    mask = sum(map(BIT.__getitem__, cards))
+    if bin(mask).count('1') != len(cards):
+        raise ValueError("duplicate cards")
+    return mask
+
+
+def to_cards(mask):
+    """Returns the cards (in integer form) in :mask, in order of their bits."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(CARDS[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+
+def from_hands(hands):
+    """
+    Returns the masks of many hands, each a sequence of distinct cards, as
+    an array('Q'); or, given an (N, k) numpy array of cards, a numpy
+    uint64 array, computed without a Python loop.
+    """
+    if numpy is not None and isinstance(hands, numpy.ndarray):
+        return _from_card_array(hands)
+    bit = BIT.__getitem__
+    return array('Q', (sum(map(bit, hand)) for hand in hands))
+
+
+def _from_card_array(hands):
+    hands = numpy.asarray(hands, dtype=numpy.int64)
+    suits = numpy.array(SUIT_INDEX, dtype=numpy.uint64)[(hands >> 12) & 0xF]
+    ranks = ((hands >> 8) & 0xF).astype(numpy.uint64)
+    bits = numpy.left_shift(numpy.uint64(1), numpy.uint64(13) * suits + ranks)
+    return numpy.bitwise_or.reduce(bits, axis=-1)
+
+
+def count_key(s0, s1, s2, s3):
+    """
+    The rank-count index of four suit slices: the rankbits of the ranks
+    with at least 1, 2, 3 and 4 cards, packed 13 bits apiece.
+    """
+    a, b = s0 | s1, s2 | s3
+    two = (s0 & s1) | (s2 & s3) | (a & b)
+    three = (s0 & s1 & b) | (s2 & s3 & a)
+    four = s0 & s1 & s2 & s3
+    return (a | b) | (two << 13) | (three << 26) | (four << 39)
+
+
+class MaskTable(object):
+    """
+    Lookup tables for masks, from a DirectTable:
+
+      flush:   list of length 8192, rankbits (5 to 7 bits set) => best rank
+      counts:  dict, rank-count index (see count_key) of 5 to 7 cards => best rank
+    """
+
+    def __init__(self, table=None):
+        if table is None:
+            table = direct.shared_table()
+        self.flush = table.flush
+        self.counts = {}
+        for product, rank in table.unsuited.items():
+            slices = [0, 0, 0, 0]
+            for r, p in enumerate(card.PRIMES):
+                n = 0
+                while product % p == 0:
+                    product //= p
+                    slices[n] |= 1 << r
+                    n += 1
+            self.counts[count_key(*slices)] = rank
+
+
+def shared_table():
+    """Returns a MaskTable for this process, built on the first call and reused from then on."""
+    global _shared
+    if _shared is None:
+        _shared = MaskTable()
+    return _shared
+
+
+def evaluate(mask, table=None):
+    """Evaluates a mask of 5 to 7 cards."""
+    if table is None:
+        table = shared_table()
+    s0 = mask & 0x1FFF
+    s1 = (mask >> 13) & 0x1FFF
+    s2 = (mask >> 26) & 0x1FFF
+    s3 = mask >> 39
+    if _POP[s0] >= 5:
+        return table.flush[s0]
+    if _POP[s1] >= 5:
+        return table.flush[s1]
+    if _POP[s2] >= 5:
+        return table.flush[s2]
+    if _POP[s3] >= 5:
+        return table.flush[s3]
+    a, b = s0 | s1, s2 | s3
+    return table.counts[(a | b) | (((s0 & s1) | (s2 & s3) | (a & b)) << 13)
+                        | (((s0 & s1 & b) | (s2 & s3 & a)) << 26) | ((s0 & s1 & s2 & s3) << 39)]
+
+
+def evaluate_many(masks, table=None):
+    """Evaluates many masks of 5 to 7 cards, returning the ranks as an array('H')."""
+    if table is None:
+        table = shared_table()
+    return array('H', (evaluate(int(m), table) for m in masks))
@@ -0,0 +1,126 @@
+"""
+A caching wrapper around Evaluator, for callers (solvers, tree walkers)
+which evaluate the same sets of cards over and over.
+
+The cache is keyed by a form of the hand which doesn't depend on the order
+of the cards, computed in a single pass, which is a good deal cheaper than
+the 21 five-card lookups of a 7-card evaluation:
+
+  - by default, the 52-bit mask of the cards;
+  - with canonical=True, the rankbits of each suit, sorted and packed into
+    a single int, which is also the same for hands which differ only by a
+    relabelling of the suits (see the suits module), and so get more hits.
+
+The cache holds at most :maxsize hands, evicting the least recently used,
+and can be saved to disk and used to warm up another one later.
+"""
+import struct
+from array import array
+from collections import OrderedDict
+from .evaluator import Evaluator
+from .masks import BIT
+from .suits import canonical_key
+from .util.io import check_header, pack_header, replace_file
+
+MAGIC = b'TREYSMEM'
+VERSION = 1
+# magic, version, byte-order mark, canonical flag, number of entries
+HEADER = struct.Struct('=8sIIII')
+
+
+def mask_key(cards):
+    """The 52-bit mask of :cards (see the masks module)."""
+    return sum(map(BIT.__getitem__, cards))
+
+
+class CachingEvaluator(object):
+    """
+    Evaluates hands through :evaluator (a new default Evaluator if not
+    given), remembering the ranks of up to :maxsize distinct hands.  With
+    canonical=True, hands which are the same up to suits share an entry.
+    """
+
+    def __init__(self, evaluator=None, maxsize=1 << 20, canonical=False):
+        self.evaluator = evaluator if evaluator is not None else Evaluator()
+        self.maxsize = maxsize
+        self.canonical = canonical
+        self.key = canonical_key if canonical else mask_key
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.cache)
+
+    def evaluate(self, cards, board):
+        """The same as Evaluator.evaluate, by way of the cache."""
+        all_cards = cards + board
+        key = self.key(all_cards)
+        cache = self.cache
+        rank = cache.get(key)
+        if rank is None:
+            self.misses += 1
+            rank = cache[key] = self.evaluator.hand_size_map[len(all_cards)](all_cards)
+            if len(cache) > self.maxsize:
+                cache.popitem(last=False)
+        else:
+            self.hits += 1
+            cache.move_to_end(key)
+        return rank
+
+    def stats(self):
+        """Returns the hits, misses, hit rate and current size of the cache, as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.cache),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        """Empties the cache, and resets the statistics."""
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path):
+        """
+        Writes the cache to :path, least recently used first, by way of a
+        temporary file, so that concurrent readers never see a partial file.
+        """
+        keys = array('Q', self.cache.keys())
+        ranks = array('H', self.cache.values())
+        header = pack_header(HEADER, MAGIC, VERSION, int(self.canonical), len(keys))
+        replace_file(path, [header, memoryview(keys), memoryview(ranks)])
+
+    def warm(self, path):
+        """
+        Adds the entries saved (by save) in :path to the cache, as the most
+        recently used, and returns how many there were.  The file must have
+        been saved with the same kind of key (canonical or not).
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        canonical, count = check_header(HEADER, data, MAGIC, VERSION, 'saved cache', path)
+        if bool(canonical) != self.canonical:
+            raise ValueError("saved cache has %s keys: %s" % (
+                'canonical' if canonical else 'non-canonical', path))
+        keys = array('Q')
+        ranks = array('H')
+        offset = HEADER.size
+        try:
+            keys.frombytes(data[offset:offset + 8 * count])
+            ranks.frombytes(data[offset + 8 * count:offset + 10 * count])
+        except ValueError:
+            keys = ranks = ()
+        if len(keys) != count or len(ranks) != count:
+            raise ValueError("saved cache is truncated: %s" % path)
+        cache = self.cache
+        for key, rank in zip(keys, ranks):
+            cache[key] = rank
+            cache.move_to_end(key)
+        while len(cache) > self.maxsize:
+            cache.popitem(last=False)
+        return count
@@ -0,0 +1,87 @@
+"""
+Omaha high: 4, 5 or 6 hole cards, where the best hand must use exactly two
+of them together with exactly three cards of the board.
+
+Run through the 5-card evaluator, that's every pair of hole cards against
+every three cards of the board, up to 15 * 10 = 150 evaluations per hand.
+Instead we split each 5-card hand into its two halves, and work out what we
+need of each half just once:
+
+  - for each three cards of the board, the prime product of their ranks,
+    and (if they share a suit) the suit and their rankbits;
+  - likewise for each pair of hole cards.
+
+The best non-flush rank is then the least of unsuited[p * q] over the
+distinct products p of the pairs and q of the triples, which is usually
+far fewer than all the combinations, since many share their ranks.  A flush
+can only come from a suited pair and a triple of the same suit; and as a
+flush always beats the unsuited rank of the same five ranks (a straight or
+high card), we can just take the least of the two.
+
+The per-board half is kept in an OmahaBoard, which is worth reusing when
+evaluating many hands against the same board.
+"""
+import itertools
+from . import direct
+
+
+def _halves(cards, k):
+    """
+    Returns the distinct prime products of the :k-card subsets of :cards,
+    and a dict mapping each suit (as a nibble shifted into place) to the
+    rankbits of every suited :k-card subset.
+    """
+    products = set()
+    suited = {}
+    for subset in itertools.combinations(cards, k):
+        product = 1
+        suit = 0xF000
+        bits = 0
+        for c in subset:
+            product *= c & 0xFF
+            suit &= c
+            bits |= c >> 16
+        products.add(product)
+        if suit:
+            suited.setdefault(suit, []).append(bits)
+    return products, suited
+
+
+class OmahaBoard(object):
+    """
+    The partial results for a board of 3 to 5 cards (in integer form),
+    against which any number of Omaha hands can then be evaluated.
+    """
+
+    def __init__(self, board, table=None):
+        if not 3 <= len(board) <= 5:
+            raise ValueError("an Omaha board has 3 to 5 cards")
+        self.board = list(board)
+        self.table = table if table is not None else direct.shared_table()
+        self.products, self.suited = _halves(board, 3)
+
+    def evaluate(self, hand):
+        """
+        Returns the rank (as from Evaluator.evaluate) of the best hand made of
+        exactly two of the 4 to 6 hole cards in :hand and three of the board.
+        """
+        if not 4 <= len(hand) <= 6:
+            raise ValueError("an Omaha hand has 4 to 6 hole cards")
+        unsuited = self.table.unsuited
+        pairs, suited = _halves(hand, 2)
+        best = min(map(unsuited.__getitem__,
+                       {p * q for p in pairs for q in self.products}))
+        if self.suited and suited:
+            flush = self.table.flush
+            for suit, pairbits in suited.items():
+                triplebits = self.suited.get(suit)
+                if triplebits:
+                    rank = min(flush[a | b] for a in pairbits for b in triplebits)
+                    if rank < best:
+                        best = rank
+        return best
+
+
+def evaluate(hand, board, table=None):
+    """Evaluates an Omaha :hand (4 to 6 hole cards) on a :board of 3 to 5 cards."""
+    return OmahaBoard(board, table).evaluate(hand)
@@ -0,0 +1,258 @@
+"""
+Parallel evaluation over a process pool, with the lookup tables in shared
+memory.
+
+The tables are those of the direct engine (see the direct module), recast
+into flat arrays and published once, in a single multiprocessing
+shared_memory block:
+
+  flush:     array('H') of length 8192, rankbits of a flush => rank
+  unsuited:  array('H'), indexed by a minimal perfect hash of the prime
+             product of 5 to 7 ranks (see lookup.perfect_hash)
+
+Workers attach to the block when they start, and read the tables from it in
+place, so there is one copy of them however many workers there are (a few
+hundred Kb, against some megabytes of dicts per worker otherwise).
+
+The hands go the same way: each call copies the cards into a shared input
+block in one go, the workers each evaluate a range of rows from it, writing
+the ranks into a shared output block, and only the block names and row
+ranges are pickled.
+
+As with Evaluator.evaluate, there is no input validation: each hand is
+expected to be 5 to 7 distinct cards in integer form.
+"""
+import itertools
+import os
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from . import direct
+from .direct import SUIT_INC, FLUSH_SUIT
+from .lookup import CompactLookupTable, perfect_hash
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'TREYSSHM'
+# magic, number of unsuited entries, hash bucket bits, padding
+HEADER = struct.Struct('=8sIII')
+
+# Rows per task, at most; calls are split into at least this many tasks
+# per worker, to even out the load.
+CHUNKSIZE = 1 << 15
+TASKS_PER_WORKER = 4
+
+# The SharedTables of a worker process, attached by _init_worker.
+_tables = None
+
+
+def _attach(name):
+    """
+    Attaches to an existing shared memory block.  Where we can, we ask not
+    to have it tracked, since it's the creator that unlinks it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedTables(object):
+    """
+    The direct engine's tables, in a shared memory block (see above).
+    Make them with create(), in the process that owns them, and attach()
+    to them by name elsewhere.
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        magic, size, bucketbits, _ = HEADER.unpack_from(shm.buf)
+        if magic != MAGIC:
+            raise ValueError("not a shared table block: %s" % shm.name)
+        self.size = size
+        self.shift = 32 - bucketbits
+        offset = HEADER.size
+        self.displace, offset = self._view(offset, 'I', 1 << bucketbits)
+        self.unsuited, offset = self._view(offset, 'H', size)
+        self.flush, offset = self._view(offset, 'H', 8192)
+
+    def _view(self, offset, typecode, length):
+        end = offset + length * struct.calcsize(typecode)
+        return self.shm.buf[offset:end].cast(typecode), end
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, table=None):
+        """Publishes the tables of a DirectTable (by default, the shared one) in a new block."""
+        if table is None:
+            table = direct.shared_table()
+        products = list(table.unsuited)
+        for bucketbits in (15, 16, 17):
+            found = perfect_hash(products, bucketbits)
+            if found is not None:
+                break
+        else:
+            raise RuntimeError("can't find a perfect hash for the unsuited table")
+        displace, slots = found
+        parts = [HEADER.pack(MAGIC, len(slots), bucketbits, 0),
+                 array('I', displace).tobytes(),
+                 array('H', (table.unsuited[k] for k in slots)).tobytes(),
+                 array('H', table.flush).tobytes()]
+        data = b''.join(parts)
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attaches to the tables published (by create) under :name."""
+        return cls(_attach(name))
+
+    def evaluate(self, cards):
+        """Evaluates 5, 6 or 7 cards in integer form."""
+        ranks = array('H', [0])
+        _evaluate_rows(self, list(cards), ranks, len(cards), 0, 1)
+        return ranks[0]
+
+    def close(self):
+        """Detaches from the block, and (in its owner) frees it."""
+        for view in (self.displace, self.unsuited, self.flush):
+            view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _evaluate_rows(tables, cards, ranks, width, start, stop):
+    """
+    Evaluates rows :start to :stop of the flat :cards (:width to a row,
+    the first row being :start), writing the ranks into ranks[start:stop].
+    """
+    flush, unsuited, displace = tables.flush, tables.unsuited, tables.displace
+    shift, size = tables.shift, tables.size
+    mult = CompactLookupTable.HASH_MULT
+    pos = 0
+    for i in range(start, stop):
+        row = cards[pos:pos + width]
+        pos += width
+        suits = 0
+        product = 1
+        for c in row:
+            suits += SUIT_INC[(c >> 12) & 0xF]
+            product *= c & 0xFF
+        suit = FLUSH_SUIT[suits]
+        if suit:
+            bits = 0
+            for c in row:
+                if c & suit:
+                    bits |= c >> 16
+            ranks[i] = flush[bits]
+        else:
+            x = product * mult & 0xFFFFFFFF
+            ranks[i] = unsuited[(x + displace[x >> shift]) % size]
+
+
+def _init_worker(name):
+    global _tables
+    _tables = SharedTables.attach(name)
+
+
+def _task(cards_name, ranks_name, width, start, stop):
+    """Evaluates a range of rows, from the shared input block into the shared output block."""
+    cards_shm = _attach(cards_name)
+    ranks_shm = _attach(ranks_name)
+    try:
+        with cards_shm.buf[4 * width * start:4 * width * stop].cast('I') as view:
+            cards = view.tolist()
+        with ranks_shm.buf.cast('H') as ranks:
+            _evaluate_rows(_tables, cards, ranks, width, start, stop)
+    finally:
+        cards_shm.close()
+        ranks_shm.close()
+
+
+def _as_cards(hands, width):
+    """Returns the hands as a bytes-like object of uint32 cards, and their width."""
+    if numpy is not None and isinstance(hands, numpy.ndarray):
+        if hands.ndim == 2:
+            width = hands.shape[1]
+        return memoryview(numpy.ascontiguousarray(hands, dtype=numpy.uint32)).cast('B'), width
+    if isinstance(hands, array):
+        if width is None:
+            raise ValueError("need the width of a flat array of hands")
+        if hands.typecode != 'I':
+            hands = array('I', hands)
+        return memoryview(hands).cast('B'), width
+    hands = list(hands)
+    if width is None:
+        width = len(hands[0]) if hands else 5
+    return memoryview(array('I', itertools.chain.from_iterable(hands))).cast('B'), width
+
+
+class ParallelEvaluator(object):
+    """
+    Evaluates batches of hands over a pool of :workers processes (one per
+    CPU by default), with the tables published once in shared memory.  Use
+    it as a context manager, or call close() when done, so that the pool
+    and the shared memory are released.
+
+        with ParallelEvaluator() as pe:
+            ranks = pe.evaluate(hands)
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.tables = SharedTables.create()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.tables.name,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown()
+        self.tables.close()
+
+    def evaluate(self, hands, width=None):
+        """
+        Evaluates many hands of the same size, returning their ranks as an
+        array('H').  The hands may be a sequence of hands, an (N, width)
+        numpy array, or a flat array('I') of N * :width cards (as from
+        deck.Dealer or codec.parse_many).
+        """
+        data, width = _as_cards(hands, width)
+        if width not in (5, 6, 7):
+            raise ValueError("need hands of 5, 6 or 7 cards")
+        if len(data) % (4 * width):
+            raise ValueError("%d cards don't split into hands of %d" % (len(data) // 4, width))
+        n = len(data) // (4 * width)
+        if n == 0:
+            return array('H')
+        cards_shm = shared_memory.SharedMemory(create=True, size=len(data))
+        ranks_shm = shared_memory.SharedMemory(create=True, size=2 * n)
+        try:
+            cards_shm.buf[:len(data)] = data
+            step = max(1, min(CHUNKSIZE, -(-n // (TASKS_PER_WORKER * self.workers))))
+            futures = [self.pool.submit(_task, cards_shm.name, ranks_shm.name, width,
+                                        start, min(start + step, n))
+                       for start in range(0, n, step)]
+            for future in futures:
+                future.result()
+            ranks = array('H')
+            ranks.frombytes(ranks_shm.buf[:2 * n])
+            return ranks
+        finally:
+            for shm in (cards_shm, ranks_shm):
+                shm.close()
+                shm.unlink()
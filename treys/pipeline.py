@@ -0,0 +1,227 @@
+"""
+Streaming evaluation of hand histories: a CSV or JSONL file of hands in,
+the same rows out with each hand's rank, rank class and class string added.
+
+Each row holds the hole cards and the board as compact strings ("AhKd",
+"Qs7c2d9h"), under the fields "hand" and "board" by default; in JSONL they
+may also be lists of cards (["Ah", "Kd"]).  Hole cards plus board must make
+5, 6 or 7 cards.
+
+Lines are read, evaluated and written a chunk at a time, so memory stays
+bounded however large the file.  With workers, chunks of raw lines go out
+to a process pool, with a couple of chunks per worker in flight, and come
+back as finished output, which is written in the original order.  A CSV
+row must fit on one line; the new fields are appended to it as it stands.
+Evaluation is by the direct engine (see the direct module), after parsing
+all the cards of a chunk in one go with the codec module.
+
+From the command line:
+
+    python -m treys.pipeline hands.csv -o ranked.csv --workers 4
+
+or treys-eval, once installed.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from . import codec
+from . import direct
+from .lookup import LookupTable, RANK_CLASS
+
+FORMATS = ('csv', 'jsonl')
+CHUNKSIZE = 10000
+
+# The fields added to each row.
+FIELDS = ('rank', 'rank_class', 'class_string')
+
+# What's appended to a CSV line for each rank.
+_SUFFIX = [''] + [',%d,%d,%s\n' % (r, RANK_CLASS[r], LookupTable.RANK_CLASS_TO_STRING[RANK_CLASS[r]])
+                  for r in range(1, LookupTable.MAX_HIGH_CARD + 1)]
+
+
+def _cards(value):
+    """A field of cards, as a compact string or a list of card strings."""
+    if isinstance(value, str):
+        return value.strip()
+    return ''.join(value)
+
+
+def rank_chunk(texts, start=0):
+    """
+    Evaluates a list of compact strings of cards (hole cards and board
+    together), returning their ranks as a list.  Raises ValueError for any
+    which isn't 5 to 7 distinct, valid cards, naming its row (counting from
+    :start).
+    """
+    # check each row's length first, since two rows of an odd length would
+    # pair up again in the parse of the whole chunk
+    for i, text in enumerate(texts):
+        if len(text) % 2 or not 10 <= len(text) <= 14:
+            raise ValueError("row %d: need 5 to 7 distinct cards, got %r" % (start + i, text))
+    table = direct.shared_table()
+    evaluate = direct.evaluate
+    try:
+        cards = codec.parse(''.join(texts))
+    except ValueError:
+        cards = None
+    ranks = []
+    pos = 0
+    for i, text in enumerate(texts):
+        n = len(text) // 2
+        try:
+            if cards is None:
+                hand = codec.parse(text)
+            else:
+                hand = cards[pos:pos + n]
+                pos += n
+            if not 5 <= n <= 7 or len(set(hand)) != n:
+                raise ValueError("need 5 to 7 distinct cards, got %r" % text)
+            ranks.append(evaluate(table, hand))
+        except ValueError as e:
+            raise ValueError("row %d: %s" % (start + i, e))
+    return ranks
+
+
+def _fields(header, hand_field, board_field):
+    """The column indexes of the hand and board fields, from a CSV header line."""
+    names = next(csv.reader([header]))
+    try:
+        return names.index(hand_field), names.index(board_field)
+    except ValueError:
+        raise ValueError("missing field %r or %r in header" % (hand_field, board_field))
+
+
+def rank_lines(lines, fmt='csv', fields=('hand', 'board'), start=0):
+    """
+    Evaluates a chunk of lines of CSV (one row per line, without the header)
+    or JSONL, returning the output for them as a single string.  For CSV,
+    :fields are the column indexes of the hand and board (see _fields), and
+    the new fields are appended to each line as it stands; for JSONL, they
+    are the keys, and the new fields are added to each object.
+    """
+    hand, board = fields
+    if fmt == 'csv':
+        try:
+            texts = [_cards(row[hand]) + _cards(row[board]) for row in csv.reader(lines)]
+        except IndexError:
+            raise ValueError("short row in rows %d-%d" % (start, start + len(lines) - 1))
+        ranks = rank_chunk(texts, start)
+        return ''.join([line.rstrip('\r\n') + _SUFFIX[r] for line, r in zip(lines, ranks)])
+    objects = [json.loads(line) for line in lines]
+    try:
+        texts = [_cards(o[hand]) + _cards(o[board]) for o in objects]
+    except KeyError as e:
+        raise ValueError("missing field %s in rows %d-%d" % (e, start, start + len(lines) - 1))
+    out = []
+    for o, r in zip(objects, rank_chunk(texts, start)):
+        o['rank'] = r
+        o['rank_class'] = RANK_CLASS[r]
+        o['class_string'] = LookupTable.RANK_CLASS_TO_STRING[RANK_CLASS[r]]
+        out.append(json.dumps(o))
+        out.append('\n')
+    return ''.join(out)
+
+
+def process(infile, outfile, fmt='csv', hand_field='hand', board_field='board',
+            workers=None, chunksize=CHUNKSIZE):
+    """
+    Evaluates every hand in the stream :infile (CSV with a header line, or
+    JSONL; blank lines are skipped), writing the rows with their ranks
+    added to the stream :outfile, in the same format and order.  Returns
+    the number of rows.
+
+    Works a chunk of lines at a time; with :workers (None for one per CPU,
+    1 to work in this process) the parsing, evaluation and formatting of
+    each chunk all happen in a worker, and this process just reads and
+    writes lines.
+    """
+    if fmt not in FORMATS:
+        raise ValueError("invalid format '%s'" % fmt)
+    if fmt == 'csv':
+        header = infile.readline()
+        if not header.strip():
+            return 0
+        fields = _fields(header, hand_field, board_field)
+        outfile.write(header.rstrip('\r\n') + ',' + ','.join(FIELDS) + '\n')
+    else:
+        fields = (hand_field, board_field)
+    lines = (line for line in infile if line.strip())
+    count = 0
+
+    def chunks():
+        start = 0
+        while True:
+            chunk = list(itertools.islice(lines, chunksize))
+            if not chunk:
+                return
+            yield (chunk, fmt, fields, start)
+            start += len(chunk)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for args in chunks():
+            outfile.write(rank_lines(*args))
+            count += len(args[0])
+        return count
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        tasks = chunks()
+        # keep a couple of chunks per worker in flight, and write in order
+        for args in tasks:
+            pending.append((len(args[0]), pool.submit(rank_lines, *args)))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            n, future = pending.pop(0)
+            text = future.result()
+            args = next(tasks, None)
+            if args is not None:
+                pending.append((len(args[0]), pool.submit(rank_lines, *args)))
+            outfile.write(text)
+            count += n
+    return count
+
+
+def _format_of(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.json')) else 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='treys-eval',
+        description="Adds the rank, rank class and class string of each hand "
+                    "in a CSV or JSONL file of hands.")
+    parser.add_argument('input', help="input file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('-f', '--format', choices=FORMATS,
+                        help="file format (default: from the input's extension, else csv)")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="worker processes (default: 1, in this process; 0 for one per CPU)")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE, help="rows per chunk")
+    parser.add_argument('--hand-field', default='hand', help="field with the hole cards")
+    parser.add_argument('--board-field', default='board', help="field with the board")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or _format_of(args.input)
+    infile = outfile = None
+    try:
+        infile = sys.stdin if args.input == '-' else open(args.input, newline='')
+        outfile = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+        process(infile, outfile, fmt, hand_field=args.hand_field, board_field=args.board_field,
+                workers=args.workers or None, chunksize=args.chunksize)
+    except (OSError, ValueError) as e:
+        parser.exit(1, "treys-eval: %s\n" % e)
+    finally:
+        for stream in (infile, outfile):
+            if stream not in (None, sys.stdin, sys.stdout):
+                stream.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+"""
+Heads-up all-in equities before the flop, for each pair of the 169 classes
+of starting hand (pairs, suited and offsuit hands of two ranks), and for
+each class against a random hand.
+
+The equity of one class against another is that of a combo of the first
+against a combo of the second, averaged over every pair of combos which
+don't share a card, and over every board.  So classes whose combos overlap
+(AKs against AA, say) are weighted by how many pairs of combos are actually
+possible, just as at the table.
+
+Rather than working out each matchup, we go board by board: rank all 1326
+combos on the board (boardrank.rank_all), sort them, and from running counts
+of each class in that order get, for every combo, how many of each class it
+beats and ties; summed by class, less the pairs which share a card, that's
+every matchup on the board at once.  Since classes don't care about suits,
+it's enough to do one board out of each class of boards which differ only
+by relabelling the suits (134,459 of them), weighted by the size of the
+class, as listed by the boardindex module.  The boards are split into a
+fixed number of pieces and spread across worker processes, and the tallies
+so far can be kept in a checkpoint file, from which an interrupted build
+resumes.  Building needs numpy.
+
+The table ships with the package (see DEFAULT_PATH), and is loaded on first
+use; lookups are then just an index into an array.  To rebuild it:
+
+    python -m treys.preflop --write treys/data/preflop.bin --checkpoint /tmp/preflop.ckpt
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from . import boardindex
+from . import card
+from . import direct
+from .boardrank import COMBOS, rank_all
+from .util.io import check_header, pack_header, replace_file
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'TREYSPRE'
+CHECKPOINT_MAGIC = b'TREYSPCK'
+VERSION = 1
+# magic, version, byte-order mark, number of classes; then the equity of
+# each class against each (float32, row by row), and against a random hand
+HEADER = struct.Struct('=8sIII')
+CLASSES = 169
+
+# The number of pieces the boards are split into (fixed, so that a
+# checkpoint is good for any number of workers).
+PIECES = 256
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'preflop.bin')
+
+# The boards dealt with each pair of hands which share no card.
+BOARDS = math.comb(48, 5)
+
+
+def _labels():
+    """
+    The label of each class, by index: 13 * i + j for the ranks i and j
+    places below the ace, suited above the diagonal (i < j), offsuit below.
+    """
+    labels = []
+    for i in range(13):
+        for j in range(13):
+            hi, lo = card.RANKS[12 - min(i, j)], card.RANKS[12 - max(i, j)]
+            labels.append(hi + lo + ('' if i == j else 's' if i < j else 'o'))
+    return labels
+
+LABELS = tuple(_labels())
+LABEL_INDEX = {label: i for i, label in enumerate(LABELS)}
+
+# The PreflopTable, loaded on first use.
+_shared = None
+
+
+def class_index(hand):
+    """Returns the index of the class of a two-card hand, or of a label such as "AKs"."""
+    if isinstance(hand, str):
+        try:
+            return LABEL_INDEX[hand]
+        except KeyError:
+            raise ValueError("invalid starting hand class: %s" % hand)
+    a, b = hand
+    if a == b:
+        raise ValueError("duplicate card in hand")
+    i, j = 12 - card.get_rank_int(a), 12 - card.get_rank_int(b)
+    if i > j:
+        i, j = j, i
+    if i != j and card.get_suit_int(a) != card.get_suit_int(b):
+        i, j = j, i
+    return 13 * i + j
+
+
+# Each of COMBOS => the index of its class.
+COMBO_CLASS = tuple(class_index(c) for c in COMBOS)
+
+
+class PreflopTable(object):
+    """
+    The equities of every class against every other, and against a random
+    hand, as array('f')s, the first one row by row.
+    """
+
+    def __init__(self, matchups, random):
+        self.matchups = matchups
+        self.random = random
+
+    def equity(self, hand, other=None):
+        """
+        The equity of :hand against :other (a random hand if None), each a
+        class label or two cards; two cards are taken as their class.
+        """
+        i = class_index(hand)
+        if other is None:
+            return self.random[i]
+        return self.matchups[CLASSES * i + class_index(other)]
+
+
+def save(table, path):
+    """Writes a PreflopTable to :path."""
+    header = pack_header(HEADER, MAGIC, VERSION, CLASSES)
+    replace_file(path, [header, memoryview(table.matchups), memoryview(table.random)])
+
+
+def load(path=None):
+    """Reads a PreflopTable saved by save() from :path (or DEFAULT_PATH)."""
+    if path is None:
+        path = DEFAULT_PATH
+    with open(path, 'rb') as f:
+        data = f.read()
+    classes, = check_header(HEADER, data, MAGIC, VERSION, 'preflop table file', path)
+    if classes != CLASSES:
+        raise ValueError("preflop table file has %d classes: %s" % (classes, path))
+    size = 4 * CLASSES * (CLASSES + 1)
+    if len(data) != HEADER.size + size:
+        raise ValueError("preflop table file is truncated: %s" % path)
+    matchups, random = array('f'), array('f')
+    matchups.frombytes(data[HEADER.size:HEADER.size + 4 * CLASSES * CLASSES])
+    random.frombytes(data[HEADER.size + 4 * CLASSES * CLASSES:])
+    return PreflopTable(matchups, random)
+
+
+def shared_table():
+    """Returns the packaged PreflopTable, loading it on the first call."""
+    global _shared
+    if _shared is None:
+        _shared = load()
+    return _shared
+
+
+def preflop_equity(hand, other=None):
+    """The all-in equity of :hand against :other (a random hand if None); see PreflopTable.equity."""
+    return shared_table().equity(hand, other)
+
+
+def boards():
+    """
+    Returns one board (as a list of cards) out of each class of 5-card boards
+    under relabelling of the suits, with the size of its class, as a list
+    of (board, weight); see the boardindex module.
+    """
+    index = boardindex.shared_index(5)
+    return [(list(board), weight) for board, weight in zip(index.boards, index.multiplicity)]
+
+
+class _Setup(object):
+    """
+    What the workers need, over and over: the boards, the classes, and the
+    pairs of combos which share a card.
+    """
+
+    def __init__(self):
+        self.boards = boards()
+        self.classes = numpy.array(COMBO_CLASS, dtype=numpy.int64)
+        self.totals = numpy.bincount(self.classes, minlength=CLASSES)
+        by_card = {}
+        for i, combo in enumerate(COMBOS):
+            for c in combo:
+                by_card.setdefault(c, []).append(i)
+        a, b = [], []
+        for i, combo in enumerate(COMBOS):
+            for j in sorted(set(by_card[combo[0]]) | set(by_card[combo[1]])):
+                a.append(i)
+                b.append(j)
+        self.a = numpy.array(a)
+        self.b = numpy.array(b)
+        self.pairs = self.classes[self.a] * CLASSES + self.classes[self.b]
+
+    def tally(self, ranks):
+        """
+        Returns, for one board's :ranks of COMBOS (0 for dead combos), the
+        number of pairs of combos with no card in common in which a combo of
+        each class beats, and ties with, one of each other class.
+        """
+        ranks = numpy.frombuffer(ranks, dtype=numpy.uint16).astype(numpy.int64)
+        live = numpy.nonzero(ranks)[0]
+        # how many of each class have each of the distinct ranks, best first;
+        # combos share ranks so much that there are only a few hundred
+        distinct, position = numpy.unique(ranks[live], return_inverse=True)
+        n = len(distinct)
+        counts = numpy.bincount(self.classes[live] * n + position, minlength=CLASSES * n)
+        counts = counts.reshape(CLASSES, n).astype(numpy.float64)
+        # and how many of each class have a rank worse than each one
+        worse = counts.sum(axis=1)[:, None] - numpy.cumsum(counts, axis=1)
+        size = CLASSES * CLASSES
+        wins = (counts @ worse.T).ravel()
+        ties = (counts @ counts.T).ravel()
+        # less the pairs which share a card (including each combo with itself)
+        ra, rb = ranks[self.a], ranks[self.b]
+        both = (ra > 0) & (rb > 0)
+        wins -= numpy.bincount(self.pairs, both & (ra < rb), size)
+        ties -= numpy.bincount(self.pairs, both & (ra == rb), size)
+        return wins.astype(numpy.int64), ties.astype(numpy.int64)
+
+
+_setup = None
+
+
+def _tally_piece(piece):
+    """Worker: the weighted tallies (wins, ties) over the boards of piece number :piece."""
+    global _setup
+    if _setup is None:
+        _setup = _Setup()
+    table = direct.shared_table()
+    wins = numpy.zeros(CLASSES * CLASSES, dtype=numpy.int64)
+    ties = numpy.zeros(CLASSES * CLASSES, dtype=numpy.int64)
+    for board, weight in _setup.boards[piece::PIECES]:
+        w, t = _setup.tally(rank_all(board, table))
+        wins += weight * w
+        ties += weight * t
+    return piece, wins, ties
+
+
+def pair_counts():
+    """The number of pairs of combos, one from each class, which share no card, as a (169, 169) array."""
+    global _setup
+    if _setup is None:
+        _setup = _Setup()
+    setup = _setup
+    overlapping = numpy.bincount(setup.pairs, minlength=CLASSES * CLASSES).reshape(CLASSES, CLASSES)
+    return numpy.outer(setup.totals, setup.totals) - overlapping
+
+
+def _save_checkpoint(path, done, wins, ties):
+    header = pack_header(HEADER, CHECKPOINT_MAGIC, VERSION, PIECES)
+    replace_file(path, [header, bytes(done), wins.tobytes(), ties.tobytes()])
+
+
+def _load_checkpoint(path):
+    """Returns (done, wins, ties) from a checkpoint at :path, or None if there isn't a usable one."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    size = CLASSES * CLASSES * 8
+    if len(data) != HEADER.size + PIECES + 2 * size:
+        return None
+    try:
+        pieces, = check_header(HEADER, data, CHECKPOINT_MAGIC, VERSION, 'checkpoint', path)
+    except ValueError:
+        return None
+    if pieces != PIECES:
+        return None
+    offset = HEADER.size
+    done = bytearray(data[offset:offset + PIECES])
+    offset += PIECES
+    wins = numpy.frombuffer(data[offset:offset + size], dtype=numpy.int64).copy()
+    ties = numpy.frombuffer(data[offset + size:], dtype=numpy.int64).copy()
+    return done, wins, ties
+
+
+def build(workers=None, checkpoint=None, progress=None):
+    """
+    Computes the PreflopTable, over :workers processes (by default, one per
+    CPU; 0 or 1 to run in this process).  With :checkpoint (a path), the
+    tallies so far are saved there after each piece, and picked up from
+    there if it already exists.  If given, :progress is called with the
+    number of pieces done (out of PIECES) after each one.
+    """
+    if numpy is None:
+        raise ImportError("building the preflop table needs numpy")
+    state = _load_checkpoint(checkpoint) if checkpoint else None
+    if state is None:
+        done = bytearray(PIECES)
+        wins = numpy.zeros(CLASSES * CLASSES, dtype=numpy.int64)
+        ties = numpy.zeros(CLASSES * CLASSES, dtype=numpy.int64)
+    else:
+        done, wins, ties = state
+    todo = [p for p in range(PIECES) if not done[p]]
+
+    def record(result):
+        piece, w, t = result
+        wins[:] += w
+        ties[:] += t
+        done[piece] = 1
+        if checkpoint:
+            _save_checkpoint(checkpoint, done, wins, ties)
+        if progress:
+            progress(sum(done))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for piece in todo:
+            record(_tally_piece(piece))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_tally_piece, todo):
+                record(result)
+
+    trials = pair_counts().ravel() * BOARDS
+    scores = wins + ties / 2
+    matchups = array('f', (scores / trials).tolist())
+    scores = scores.reshape(CLASSES, CLASSES).sum(axis=1)
+    random = array('f', (scores / trials.reshape(CLASSES, CLASSES).sum(axis=1)).tolist())
+    return PreflopTable(matchups, random)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m treys.preflop',
+        description="Builds the table of heads-up preflop equities between the 169 starting hands.")
+    parser.add_argument('--write', metavar='PATH', default=DEFAULT_PATH,
+                        help="write the table to this file (default: the packaged one)")
+    parser.add_argument('--checkpoint', metavar='PATH', help="keep (and resume from) the tallies here")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    def progress(done):
+        print("%d/%d" % (done, PIECES), file=sys.stderr, flush=True)
+
+    table = build(args.workers, args.checkpoint, progress)
+    save(table, args.write)
+    for label in ('AA', 'AKs', '72o'):
+        print("%-4s vs random %.4f" % (label, table.equity(label)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
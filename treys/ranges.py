@@ -0,0 +1,201 @@
+"""
+Hand ranges, and range-vs-range equity.
+
+A range is a weighted set of hole-card combos, represented as a dict mapping
+each combo (a sorted tuple of 2 cards in integer form) to its weight.  They
+can be written in the usual shorthand, for example:
+
+    parse("QQ+, AKs, AQo:0.5, KhQh")
+
+where "QQ" is all 6 combos of a pair, "AKs" the 4 suited and "AKo" the 12
+offsuit combos of two ranks ("AK" for all 16), "QQ+" a pair and every pair
+above it, and ":w" gives the weight of that part.
+
+equity() settles one range against the other board by board: for each board
+it evaluates every live combo (of either range) just once, sorts the ranks
+of the second range, and then settles each combo of the first range against
+all of the second with a few binary searches over the sorted ranks, taking
+care of the combos which share a card (see _settle).  So each board costs
+O((|R1| + |R2|) log |R2|), rather than |R1| * |R2| evaluations.
+"""
+import bisect
+import itertools
+import random
+from . import card
+from . import direct
+from .equity import Equity, remaining_cards
+
+
+def combos(label):
+    """
+    Returns the list of combos for a single label: a pair ("QQ"), two ranks
+    ("AKs", "AKo" or "AK"), or two specific cards ("KhQh").
+    """
+    label = label.strip()
+    if len(label) == 4:
+        c = tuple(sorted((card.make(label[:2]), card.make(label[2:]))))
+        if c[0] == c[1]:
+            raise ValueError("duplicate card in combo: %s" % label)
+        return [c]
+    if len(label) not in (2, 3) or label[0] not in card.RANKS or label[1] not in card.RANKS:
+        raise ValueError("invalid range label: %s" % label)
+    suitedness = label[2:]
+    if suitedness not in ('', 's', 'o'):
+        raise ValueError("invalid range label: %s" % label)
+    first = [card.make(label[0] + s) for s in 'shdc']
+    second = [card.make(label[1] + s) for s in 'shdc']
+    if label[0] == label[1]:
+        if suitedness:
+            raise ValueError("a pair can't be suited or offsuit: %s" % label)
+        return [tuple(sorted(c)) for c in itertools.combinations(first, 2)]
+    result = []
+    for a in first:
+        for b in second:
+            suited = card.get_suit_int(a) == card.get_suit_int(b)
+            if suitedness == 's' and not suited or suitedness == 'o' and suited:
+                continue
+            result.append(tuple(sorted((a, b))))
+    return result
+
+
+def parse(text):
+    """
+    Parses a range from its shorthand (see above), returning a dict mapping
+    combos to weights.  Where the same combo turns up twice, the last
+    weight given wins.
+    """
+    result = {}
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        label, _, weight = part.partition(':')
+        weight = float(weight) if weight else 1.0
+        labels = [label.strip()]
+        if label.endswith('+'):
+            labels = _plus(label[:-1].strip())
+        for lab in labels:
+            for c in combos(lab):
+                result[c] = weight
+    return result
+
+
+def _plus(label):
+    """Expands the label in "QQ+" (pairs), or "ATs+" (kickers up to one below the top card)."""
+    hi = card.RANKS.index(label[0])
+    lo = card.RANKS.index(label[1])
+    if hi == lo:
+        return [r + r for r in card.RANKS[hi:]]
+    if lo > hi:
+        raise ValueError("invalid range label: %s+" % label)
+    return [label[0] + r + label[2:] for r in card.RANKS[lo:hi]]
+
+
+def _by_rank(entries):
+    """
+    Given (rank, weight) pairs, returns the sorted ranks, and the prefix sums
+    of the weights in that order (one longer than the ranks).
+    """
+    entries.sort()
+    ranks = [r for r, _ in entries]
+    sums = [0.0]
+    for _, w in entries:
+        sums.append(sums[-1] + w)
+    return ranks, sums
+
+
+def _settle(live1, live2, weights2):
+    """
+    Settles every combo in :live1 against every combo in :live2 with which it
+    shares no card, where each is a list of (combo, weight, rank) for one
+    board.  Returns the total weight of the matchups won by the first range,
+    won by the second, and tied.
+
+    For a combo (a, b) of rank r, the weight of the second range which it
+    beats is that of all combos ranked worse than r, less those containing
+    a, less those containing b, plus any containing both (which can only be
+    the very same combo, and that ranks the same, so not in this case);
+    and likewise for ties and for all live combos.
+    """
+    everything = _by_rank([(r, w) for _, w, r in live2])
+    bycard = {}
+    for combo, w, r in live2:
+        for c in combo:
+            bycard.setdefault(c, []).append((r, w))
+    bycard = {c: _by_rank(entries) for c, entries in bycard.items()}
+    empty = ([], [0.0])
+
+    wins = losses = ties = 0.0
+    for combo, w, r in live1:
+        a, b = combo
+        worse = same = total = 0.0
+        for sign, (ranks, sums) in ((1, everything), (-1, bycard.get(a, empty)), (-1, bycard.get(b, empty))):
+            lo = bisect.bisect_left(ranks, r)
+            hi = bisect.bisect_right(ranks, r)
+            worse += sign * (sums[-1] - sums[hi])
+            same += sign * (sums[hi] - sums[lo])
+            total += sign * sums[-1]
+        both = weights2.get(combo, 0.0)
+        same += both
+        total += both
+        wins += w * worse
+        ties += w * same
+        losses += w * (total - worse - same)
+    return wins, losses, ties
+
+
+def boards(board, dead=(), trials=None, seed=None):
+    """
+    Yields the completions of a partial board: all of them, or (with :trials)
+    that many drawn at random, with replacement, seeded with :seed.
+    """
+    board = list(board)
+    remaining = remaining_cards(board, dead)
+    need = 5 - len(board)
+    if trials is None:
+        for runout in itertools.combinations(remaining, need):
+            yield board + list(runout)
+    else:
+        rng = random.Random(seed)
+        for _ in range(trials):
+            yield board + rng.sample(remaining, need)
+
+
+def equity(range1, range2, board=(), dead=(), trials=None, seed=None):
+    """
+    Computes the equity of :range1 against :range2 (dicts of combo => weight,
+    as from parse), returning an Equity for the two of them, in which the
+    trials are the total weight of all the matchups settled.
+
+    Enumerates every completion of the board by default; given :trials,
+    samples that many instead.  With 3 or more cards to come, sampling is
+    the only practical option, and trials defaults to 1000.
+    """
+    board = list(board)
+    if len(board) > 5:
+        raise ValueError("the board has at most 5 cards")
+    if trials is None and len(board) < 3:
+        trials = 1000
+    known = set(board) | set(dead)
+    range1 = {c: w for c, w in range1.items() if not known.intersection(c)}
+    range2 = {c: w for c, w in range2.items() if not known.intersection(c)}
+    table = direct.shared_table()
+    evaluate = direct.evaluate
+
+    result = Equity(2)
+    for full in boards(board, dead, trials, seed):
+        fullset = set(full)
+        # evaluate each live combo once, for both ranges
+        ranks = {}
+        for combo in itertools.chain(range1, range2):
+            if combo not in ranks and not fullset.intersection(combo):
+                ranks[combo] = evaluate(table, list(combo) + full)
+        live1 = [(c, w, ranks[c]) for c, w in range1.items() if c in ranks]
+        live2 = [(c, w, ranks[c]) for c, w in range2.items() if c in ranks]
+        weights2 = {c: w for c, w, _ in live2}
+        wins, losses, ties = _settle(live1, live2, weights2)
+        result.update((wins + losses + ties,
+                       [wins, losses], [ties, ties],
+                       [wins + ties / 2, losses + ties / 2],
+                       [wins + ties / 4, losses + ties / 4]))
+    return result
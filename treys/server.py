@@ -0,0 +1,419 @@
+"""
+An evaluation service over asyncio: one warm Evaluator (or a worker pool)
+behind a TCP or Unix socket, which gathers concurrent requests into
+micro-batches and evaluates each batch in a single call.
+
+The protocol is a plain length-prefixed binary one, all integers in network
+byte order.  Every frame is a uint32 length (of the rest of the frame), then:
+
+  request:   uint32 id, uint8 width (5, 6 or 7), uint16 count, and then
+             count * width bytes, the cards of each hand as their index
+             (0 to 51) in card.FULL_DECK
+  response:  uint32 id, uint8 status, uint16 count, and then, for status
+             OK, count uint16 ranks; otherwise a UTF-8 error message
+
+A request may carry any number of hands (up to 65535) of one width, and
+responses carry the id of their request, so a client can have many
+requests in flight on one connection.
+
+Requests go into a bounded queue.  A single batcher takes the first one
+waiting, then keeps taking more until it has max_batch hands or the latency
+budget (counted from the first) runs out, and evaluates them all at once:
+with Evaluator.evaluate_batch (vectorized, given numpy) or, with workers,
+over a parallel.ParallelEvaluator.  While the queue is full, connections
+stop reading, so backpressure reaches the clients through their sockets.
+
+    python -m treys.server --port 5999 --latency-ms 2
+"""
+import argparse
+import asyncio
+import struct
+from . import card
+from .evaluator import Evaluator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+LENGTH = struct.Struct('!I')
+# id, width, count; for requests, and (with status for width) responses
+HEAD = struct.Struct('!IBH')
+OK = 0
+ERROR = 1
+
+MAX_COUNT = 0xFFFF
+# A request or response is never longer than this.
+MAX_FRAME = HEAD.size + 7 * MAX_COUNT
+
+# Card (in integer form) => its index in the protocol.
+INDEX = {c: i for i, c in enumerate(card.FULL_DECK)}
+
+
+def encode_request(id, hands):
+    """Encodes a request for the evaluation of :hands (each 5 to 7 cards, all the same size)."""
+    width = len(hands[0]) if hands else 5
+    for hand in hands:
+        if len(hand) != width:
+            raise ValueError("all hands in a request must have the same number of cards")
+    body = bytes(INDEX[c] for hand in hands for c in hand)
+    return LENGTH.pack(HEAD.size + len(body)) + HEAD.pack(id, width, len(hands)) + body
+
+
+async def read_frame(reader):
+    """Reads a single frame, returning its contents (after the length); None at EOF."""
+    try:
+        head = await reader.readexactly(LENGTH.size)
+    except asyncio.IncompleteReadError:
+        return None
+    length, = LENGTH.unpack(head)
+    if not HEAD.size <= length <= MAX_FRAME:
+        raise ValueError("bad frame length %d" % length)
+    try:
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ConnectionError("connection closed in the middle of a frame")
+
+
+class _Request(object):
+    __slots__ = ('id', 'width', 'count', 'cards', 'future')
+
+    def __init__(self, id, width, count, cards, future):
+        self.id = id
+        self.width = width
+        self.count = count
+        self.cards = cards
+        self.future = future
+
+
+class EvaluationServer(object):
+    """
+    Serves evaluations (see above) from :evaluator (a new Evaluator if not
+    given), or with :workers > 0 from a ParallelEvaluator with that many
+    processes.  Batches close after :latency seconds or :max_batch hands,
+    whichever comes first; at most :max_pending requests wait in the queue.
+    """
+
+    def __init__(self, evaluator=None, latency=0.002, max_batch=8192, max_pending=1024, workers=0):
+        self.evaluator = evaluator if evaluator is not None else Evaluator()
+        self.latency = latency
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.parallel = None
+        if workers:
+            from .parallel import ParallelEvaluator
+            self.parallel = ParallelEvaluator(workers)
+        self.queue = None
+        self.server = None
+        self._batcher = None
+        self._batch = []
+        self._writers = set()
+        self._closed = False
+        self.requests = 0
+        self.hands = 0
+        self.batches = 0
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Starts listening, on a Unix socket at :path if given, or else on
+        :host and :port (0 for any free port); returns the address.
+        """
+        self.queue = asyncio.Queue(self.max_pending)
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._serve, path=path)
+        else:
+            self.server = await asyncio.start_server(self._serve, host, port)
+        return self.address
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening and batching, fails every request still waiting (in
+        the queue or the batch being evaluated), and closes the connections.
+        """
+        self._closed = True
+        self.server.close()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        self._fail_waiting()
+        # let the replies to those go out before the connections close
+        await asyncio.sleep(0)
+        for writer in list(self._writers):
+            writer.close()
+        await self.server.wait_closed()
+        if self.parallel is not None:
+            self.parallel.close()
+
+    def _fail_waiting(self):
+        error = ConnectionError("server closed")
+        requests = self._batch
+        self._batch = []
+        while not self.queue.empty():
+            requests.append(self.queue.get_nowait())
+        for request in requests:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    async def _serve(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        replies = set()
+        self._writers.add(writer)
+        try:
+            while not self._closed:
+                try:
+                    frame = await read_frame(reader)
+                except (ValueError, ConnectionError):
+                    break
+                if frame is None:
+                    break
+                id, width, count = HEAD.unpack_from(frame)
+                cards = frame[HEAD.size:]
+                error = None
+                if width not in (5, 6, 7):
+                    error = "hands must have 5, 6 or 7 cards"
+                elif len(cards) != width * count:
+                    error = "expected %d cards, got %d" % (width * count, len(cards))
+                elif cards and max(cards) >= 52:
+                    error = "invalid card index %d" % max(cards)
+                else:
+                    for i in range(0, len(cards), width):
+                        if len(set(cards[i:i + width])) != width:
+                            error = "duplicate cards in hand %d" % (i // width)
+                            break
+                if error is not None:
+                    writer.write(self._response(id, ERROR, 0, error.encode('utf-8')))
+                    continue
+                future = loop.create_future()
+                # waits while the queue is full, so that we stop reading
+                await self.queue.put(_Request(id, width, count, cards, future))
+                if self._closed:
+                    self._fail_waiting()
+                task = asyncio.ensure_future(self._reply(writer, id, count, future))
+                replies.add(task)
+                task.add_done_callback(replies.discard)
+        finally:
+            if replies:
+                await asyncio.gather(*replies, return_exceptions=True)
+            self._writers.discard(writer)
+            writer.close()
+
+    def _response(self, id, status, count, body):
+        return LENGTH.pack(HEAD.size + len(body)) + HEAD.pack(id, status, count) + body
+
+    async def _reply(self, writer, id, count, future):
+        try:
+            ranks = await future
+        except Exception as e:
+            writer.write(self._response(id, ERROR, 0, str(e).encode('utf-8')))
+        else:
+            writer.write(self._response(id, OK, count, ranks))
+        await writer.drain()
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        queue = self.queue
+        while True:
+            batch = self._batch = [await queue.get()]
+            hands = batch[0].count
+            deadline = loop.time() + self.latency
+            while hands < self.max_batch:
+                timeout = deadline - loop.time()
+                if queue.empty() and timeout <= 0:
+                    break
+                try:
+                    request = queue.get_nowait() if not queue.empty() else \
+                        await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                hands += request.count
+            try:
+                results = await loop.run_in_executor(None, self._evaluate, batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            for request, ranks in zip(batch, results):
+                if request.future.done():
+                    continue
+                if isinstance(ranks, Exception):
+                    request.future.set_exception(ranks)
+                else:
+                    request.future.set_result(ranks)
+            self._batch = []
+            self.requests += len(batch)
+            self.hands += hands
+            self.batches += 1
+
+    def _evaluate(self, batch):
+        """
+        Evaluates a batch of requests, one call per hand size, returning
+        the ranks of each request as bytes of uint16 in network order.  If a
+        call fails, its requests are evaluated one by one, so that only those
+        which fail themselves get (in place of their ranks) the exception.
+        """
+        results = [None] * len(batch)
+        for width in (5, 6, 7):
+            chosen = [i for i, r in enumerate(batch) if r.width == width]
+            if not chosen:
+                continue
+            data = b''.join(batch[i].cards for i in chosen)
+            try:
+                ranks = self._ranks(data, width)
+            except Exception:
+                for i in chosen:
+                    try:
+                        results[i] = self._ranks(batch[i].cards, width)
+                    except Exception as e:
+                        results[i] = e
+                continue
+            offset = 0
+            for i in chosen:
+                n = batch[i].count
+                results[i] = ranks[2 * offset:2 * (offset + n)]
+                offset += n
+        return results
+
+    def _ranks(self, data, width):
+        """The ranks of the hands in :data (card indexes, :width to a hand), as big-endian uint16 bytes."""
+        deck = card.FULL_DECK
+        if numpy is not None:
+            cards = numpy.array(deck, dtype=numpy.uint32)[numpy.frombuffer(data, dtype=numpy.uint8)]
+            cards = cards.reshape(-1, width)
+            if self.parallel is not None:
+                ranks = self.parallel.evaluate(cards)
+            else:
+                ranks = self.evaluator.evaluate_batch(cards)
+            return numpy.asarray(ranks, dtype='>u2').tobytes()
+        rows = [[deck[b] for b in data[i:i + width]] for i in range(0, len(data), width)]
+        if self.parallel is not None:
+            ranks = self.parallel.evaluate(rows)
+        else:
+            ranks = self.evaluator.evaluate_batch(rows)
+        return struct.pack('!%dH' % len(ranks), *ranks)
+
+
+class Client(object):
+    """
+    An asyncio client for EvaluationServer.  Make one with connect(); any
+    number of evaluate() calls can then be in flight at once.  Once the
+    connection is lost, those in flight and any made later raise
+    ConnectionError.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.error = None
+        self._next = 0
+        self._reading = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=5999, path=None):
+        """Connects to a server on a Unix socket at :path if given, or else on :host and :port."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def evaluate(self, hands):
+        """
+        Evaluates :hands (each 5 to 7 cards in integer form, all the same
+        size), returning their ranks as a list.
+        """
+        if not hands:
+            return []
+        if len(hands) > MAX_COUNT:
+            raise ValueError("at most %d hands per request" % MAX_COUNT)
+        if self.error is not None:
+            raise self.error
+        self._next = (self._next + 1) & 0xFFFFFFFF
+        id = self._next
+        future = asyncio.get_running_loop().create_future()
+        self.pending[id] = future
+        try:
+            self.writer.write(encode_request(id, hands))
+            await self.writer.drain()
+        except BaseException:
+            self.pending.pop(id, None)
+            raise
+        return await future
+
+    async def _read_loop(self):
+        error = ConnectionError("connection closed")
+        try:
+            while True:
+                frame = await read_frame(self.reader)
+                if frame is None:
+                    break
+                id, status, count = HEAD.unpack_from(frame)
+                future = self.pending.pop(id, None)
+                if future is None or future.done():
+                    continue
+                body = frame[HEAD.size:]
+                if status == OK:
+                    future.set_result(list(struct.unpack('!%dH' % count, body)))
+                else:
+                    future.set_exception(ValueError(body.decode('utf-8', 'replace')))
+        except ConnectionError as e:
+            error = e
+        except ValueError as e:
+            error = ConnectionError("bad frame from server: %s" % e)
+        self.error = error
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._reading
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m treys.server',
+                                     description="Serves hand evaluations over a socket.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5999)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead")
+    parser.add_argument('--latency-ms', type=float, default=2.0, help="batching latency budget")
+    parser.add_argument('--max-batch', type=int, default=8192, help="most hands per batch")
+    parser.add_argument('--max-pending', type=int, default=1024, help="most requests queued")
+    parser.add_argument('--workers', type=int, default=0, help="evaluate over this many processes")
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = EvaluationServer(latency=args.latency_ms / 1000.0, max_batch=args.max_batch,
+                                  max_pending=args.max_pending, workers=args.workers)
+        address = await server.start(args.host, args.port, args.unix)
+        print("serving on %s" % (address,), flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Showdowns: who wins what, for a board and the hands of any number of
+players, with side pots, and without printing anything.
+
+Side pots come from what each player put in.  Sorting the distinct
+amounts, each layer between one amount and the next makes a pot, which
+holds that layer's worth from everyone who put in at least its top, and is
+contested by those of them still in the hand.  The live players with the
+best rank among those split it; chips which don't divide evenly go one each
+to the first of them in seat order (the order of the hands).  A layer which
+no live player reached (the excess of a player who folded after putting in
+more than anyone left) is dead money, and goes to the pot below it.
+
+For settling many tables at once, settle() takes arrays (a board per table
+and the hands of each player at it) and does all the tables together, with
+numpy if it's available.
+"""
+from . import direct
+from .batch import BatchTables, evaluate as evaluate_rows
+from .lookup import LookupTable, RANK_CLASS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Worse than any rank, for players out of a pot.
+WORST = LookupTable.MAX_HIGH_CARD + 1
+
+# The BatchTables for settle(), built on first use.
+_batch = None
+
+
+def _pots(contributions, live, ranks):
+    """
+    Splits :contributions into pots as above, returning a list of (amount,
+    eligible players, winners) and each player's share.
+    """
+    n = len(contributions)
+    exact = all(isinstance(c, int) for c in contributions)
+    shares = [0] * n if exact else [0.0] * n
+    pots = []
+    # a layer at 0 as well, for the dead money of a hand nobody live paid into
+    levels = sorted(set(contributions) | {0})
+    carry = 0
+    below = 0
+    layers = []
+    for level in levels:
+        contributors = [p for p in range(n) if contributions[p] >= level]
+        layers.append(((level - below) * len(contributors), contributors))
+        below = level
+    # from the top down, so dead money falls to the pot below
+    for amount, contributors in reversed(layers):
+        amount += carry
+        eligible = [p for p in contributors if live[p]]
+        if not eligible:
+            carry = amount
+            continue
+        carry = 0
+        best = min(ranks[p] for p in eligible)
+        winners = [p for p in eligible if ranks[p] == best]
+        if exact:
+            each, odd = divmod(amount, len(winners))
+            for i, p in enumerate(winners):
+                shares[p] += each + (i < odd)
+        else:
+            for p in winners:
+                shares[p] += amount / len(winners)
+        if amount:
+            pots.append((amount, eligible, winners))
+    pots.reverse()
+    return pots, shares
+
+
+class Showdown(object):
+    """
+    The outcome of a showdown (see resolve):
+
+      ranks:    each player's rank, or None for a folded player without cards
+      classes:  each player's rank class (as from Evaluator.get_rank_class), or None
+      winners:  the live players with the best rank
+      pots:     the main pot and then each side pot, as (amount, eligible
+                players, winners)
+      shares:   what each player wins, over all the pots
+    """
+
+    def __init__(self, ranks, winners, pots, shares):
+        self.ranks = ranks
+        self.classes = [RANK_CLASS[r] if r is not None else None for r in ranks]
+        self.winners = winners
+        self.pots = pots
+        self.shares = shares
+
+    def __repr__(self):
+        return 'Showdown(winners=%r, shares=%r)' % (self.winners, self.shares)
+
+
+def resolve(board, hands, contributions=None, folded=(), table=None):
+    """
+    Resolves a showdown between :hands (lists of cards in integer form, one
+    per player, with the :board making 5 to 7 cards) on :board.
+
+    :contributions gives what each player put in the pot; without it, there
+    is a single pot of 1, so that the shares are fractions of it.  Players
+    in :folded (by index) can't win anything, and their hands may be None.
+    """
+    if table is None:
+        table = direct.shared_table()
+    n = len(hands)
+    if contributions is None:
+        contributions = [1] * n
+        unit = True
+    else:
+        unit = False
+        if len(contributions) != n:
+            raise ValueError("need a contribution for each of the %d players" % n)
+    folded = set(folded)
+    live = [p not in folded for p in range(n)]
+    if not any(live):
+        raise ValueError("everyone folded")
+    ranks = []
+    for p, hand in enumerate(hands):
+        if hand is None:
+            if live[p]:
+                raise ValueError("player %d is live, but has no cards" % p)
+            ranks.append(None)
+            continue
+        cards = list(hand) + list(board)
+        if not 5 <= len(cards) <= 7:
+            raise ValueError("player %d has %d cards with the board; need 5 to 7" % (p, len(cards)))
+        ranks.append(direct.evaluate(table, cards))
+    best = min(r for p, r in enumerate(ranks) if live[p])
+    winners = [p for p in range(n) if live[p] and ranks[p] == best]
+    keyed = [r if r is not None else WORST for r in ranks]
+    pots, shares = _pots(contributions, live, keyed)
+    if unit:
+        total = float(n)
+        pots = [(amount / total, eligible, w) for amount, eligible, w in pots]
+        shares = [s / total for s in shares]
+    return Showdown(ranks, winners, pots, shares)
+
+
+def settle(boards, hands, contributions=None, folded=None):
+    """
+    Settles many tables at once, given:
+
+      boards:         (T, b) cards of each table's board
+      hands:          (T, N, h) cards of each player at each table, b + h
+                      being 5 to 7 (folded players need some cards too,
+                      but they're ignored)
+      contributions:  (T, N) what each player put in; by default 1 each
+      folded:         (T, N) true for the players who folded
+
+    and returns (ranks, shares), each (T, N): the rank of each player's hand,
+    and what each wins.  With integer contributions, shares are integers,
+    odd chips going as in resolve; otherwise they're floats.  Each table
+    needs at least one live player.  These are numpy arrays if numpy is
+    available, and lists of lists (from resolve, table by table) if not.
+    """
+    if numpy is None:
+        return _settle_python(boards, hands, contributions, folded)
+    global _batch
+    if _batch is None:
+        _batch = BatchTables(direct.shared_table())
+    boards = numpy.asarray(boards, dtype=numpy.int64)
+    hands = numpy.asarray(hands, dtype=numpy.int64)
+    if boards.ndim != 2 or hands.ndim != 3 or len(boards) != len(hands):
+        raise ValueError("need (T, b) boards and (T, N, h) hands")
+    t, n, h = hands.shape
+    cards = numpy.concatenate([hands, numpy.broadcast_to(boards[:, None, :], (t, n, boards.shape[1]))],
+                              axis=2)
+    ranks = numpy.asarray(evaluate_rows(_batch, cards.reshape(t * n, -1))).reshape(t, n)
+    if contributions is None:
+        contributions = numpy.ones((t, n), dtype=numpy.int64)
+    contributions = numpy.asarray(contributions)
+    if folded is None:
+        live = numpy.ones((t, n), dtype=bool)
+    else:
+        live = ~numpy.asarray(folded, dtype=bool)
+    if contributions.shape != (t, n) or live.shape != (t, n):
+        raise ValueError("contributions and folded must be (T, N)")
+    if not live.any(axis=1).all():
+        raise ValueError("every table needs a live player")
+    exact = contributions.dtype.kind in 'iu'
+    shares = numpy.zeros((t, n), dtype=numpy.int64 if exact else numpy.float64)
+    keyed = numpy.where(live, ranks, WORST)
+    levels = numpy.sort(contributions, axis=1)
+    carry = numpy.zeros(t, dtype=shares.dtype)
+    # from the top layer down, as in _pots
+    for k in range(n - 1, -1, -1):
+        level = levels[:, k]
+        below = levels[:, k - 1] if k else 0
+        amount = (level - below) * (n - k) + carry
+        eligible = contributions >= level[:, None]
+        best = numpy.where(eligible, keyed, WORST).min(axis=1)
+        winners = eligible & live & (keyed == best[:, None])
+        count = winners.sum(axis=1)
+        # a repeated level is an empty layer, which just passes the carry on
+        won = (count > 0) & ((level != below) | (k == 0))
+        if exact:
+            each, odd = numpy.divmod(amount, numpy.maximum(count, 1))
+            order = numpy.cumsum(winners, axis=1) - 1
+            gain = each[:, None] + (order < odd[:, None])
+        else:
+            gain = (amount / numpy.maximum(count, 1))[:, None]
+        shares += numpy.where(winners & won[:, None], gain, 0).astype(shares.dtype)
+        carry = numpy.where(won, 0, amount)
+    return ranks, shares
+
+
+def _settle_python(boards, hands, contributions, folded):
+    """settle(), table by table, for when numpy isn't around."""
+    table = direct.shared_table()
+    all_ranks, all_shares = [], []
+    for i, (board, players) in enumerate(zip(boards, hands)):
+        out = [p for p, f in enumerate(folded[i]) if f] if folded is not None else ()
+        paid = contributions[i] if contributions is not None else [1] * len(players)
+        result = resolve(board, players, paid, out, table)
+        all_ranks.append(result.ranks)
+        all_shares.append(result.shares)
+    return all_ranks, all_shares
@@ -0,0 +1,207 @@
+"""
+Hand strength and hand potential, for deciding how to play a hand before
+the river, after Billings et al.:
+
+  HS    the fraction of the opponent's possible hands we beat right now
+        (counting ties as half)
+  PPOT  of the hands which are ahead of us or tied now, the fraction we
+        end up beating by the river (positive potential)
+  NPOT  of the hands we're ahead of or tied with now, the fraction which
+        end up beating us (negative potential)
+  EHS   effective hand strength, HS * (1 - NPOT) + (1 - HS) * PPOT
+
+against a random hand, or a weighted range (see the ranges module).
+
+The naive way is a triple loop over opponent hands, runouts and the
+evaluation of both hands.  Instead, for each runout we rank all 1326 combos
+on the final board at once (boardrank.rank_all, which shares the work
+between combos with the same ranks), and then tally every opponent hand
+against our own rank with a few vectorized comparisons, grouped by whether
+it's ahead, tied or behind now.  Every runout is enumerated, 1081 of them
+from the flop (well under a second) and 46 from the turn.  With :samples,
+a random subset of them is tallied instead, but 200 leave an error of a
+few hundredths in the potential.
+
+StrengthEngine caches its results against a random hand by the canonical
+form of our hand and the board (under relabelling of the suits, as in the
+suits module), since isomorphic situations have the same strength.
+"""
+import itertools
+import random
+from collections import OrderedDict
+from . import direct
+from . import suits
+from .boardrank import COMBOS, combo_index, rank_all
+from .equity import remaining_cards
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+AHEAD, TIED, BEHIND = 0, 1, 2
+
+class HandStrength(object):
+    """
+    The strength and potential of a hand (see above); runouts is the number
+    of runouts tallied for the potential (0 on the river).
+    """
+
+    def __init__(self, hs, ppot, npot, runouts):
+        self.hs = hs
+        self.ppot = ppot
+        self.npot = npot
+        self.runouts = runouts
+
+    @property
+    def ehs(self):
+        return self.hs * (1 - self.npot) + (1 - self.hs) * self.ppot
+
+    def __repr__(self):
+        return "HandStrength(hs=%.4f, ppot=%.4f, npot=%.4f, ehs=%.4f)" % (
+            self.hs, self.ppot, self.npot, self.ehs)
+
+
+def _current_ranks(board, table):
+    """The rank of each of COMBOS with the (3 to 5 card) :board, 0 for those sharing a card with it."""
+    if len(board) == 5:
+        return list(rank_all(board, table))
+    used = set(board)
+    evaluate = direct.evaluate
+    return [0 if a in used or b in used else evaluate(table, [a, b] + board)
+            for a, b in COMBOS]
+
+
+def _weights(hand, board, opponent):
+    """The weight of each of COMBOS for the opponent, 0 for those sharing a card with us."""
+    used = set(hand) | set(board)
+    if opponent is None:
+        weights = [0.0 if a in used or b in used else 1.0 for a, b in COMBOS]
+    else:
+        weights = [0.0] * len(COMBOS)
+        for combo, w in opponent.items():
+            if not used.intersection(combo):
+                weights[combo_index(combo)] = float(w)
+    if not any(weights):
+        raise ValueError("the opponent has no possible hands")
+    return weights
+
+
+def _tally(ranks, mine, groups, totals):
+    """
+    Adds the weight of each opponent hand, with its final rank in :ranks (0
+    if dead on this runout), to :totals[now][final], :groups holding the
+    weights of the hands by where they stand now.
+    """
+    if numpy is not None:
+        r = numpy.frombuffer(ranks, dtype=numpy.uint16)
+        final = numpy.stack([r > mine, r == mine, (r < mine) & (r > 0)], axis=1)
+        totals += groups @ final
+        return
+    for now, weights in enumerate(groups):
+        row = totals[now]
+        for r, w in zip(ranks, weights):
+            if w and r:
+                row[AHEAD if r > mine else TIED if r == mine else BEHIND] += w
+
+
+def _runouts(hand, board, samples, rng):
+    """The runouts of :board to the river, all of them, or :samples drawn at random."""
+    deck = remaining_cards(hand, board)
+    need = 5 - len(board)
+    if samples is None:
+        return itertools.combinations(deck, need)
+    return (rng.sample(deck, need) for _ in range(samples))
+
+
+def strength(hand, board, opponent=None, samples=None, seed=None, table=None):
+    """
+    Computes the HandStrength of the two cards of :hand on a :board of 3 to
+    5 cards, against :opponent (a range, as a dict mapping combos to
+    weights; a random hand if None).  The potential is tallied over every
+    runout, or with :samples over that many random ones (drawn from a
+    random.Random seeded with :seed).
+    """
+    hand = list(hand)
+    board = list(board)
+    if len(hand) != 2:
+        raise ValueError("need exactly 2 hole cards")
+    if not 3 <= len(board) <= 5:
+        raise ValueError("need a board of 3 to 5 cards")
+    remaining_cards(hand, board)
+    if table is None:
+        table = direct.shared_table()
+    weights = _weights(hand, board, opponent)
+    current = _current_ranks(board, table)
+    mine = direct.evaluate(table, hand + board)
+
+    groups = [[0.0] * len(COMBOS) for _ in range(3)]
+    for i, (r, w) in enumerate(zip(current, weights)):
+        if w:
+            groups[AHEAD if r > mine else TIED if r == mine else BEHIND][i] = w
+    ahead, tied, behind = (sum(g) for g in groups)
+    hs = (ahead + tied / 2) / (ahead + tied + behind)
+    if len(board) == 5:
+        return HandStrength(hs, 0.0, 0.0, 0)
+
+    if numpy is not None:
+        groups = numpy.array(groups)
+        totals = numpy.zeros((3, 3))
+    else:
+        totals = [[0.0] * 3 for _ in range(3)]
+    index = combo_index(hand)
+    runouts = 0
+    for runout in _runouts(hand, board, samples, random.Random(seed)):
+        ranks = rank_all(board + list(runout), table)
+        _tally(ranks, ranks[index], groups, totals)
+        runouts += 1
+    hp = [[float(x) for x in row] for row in totals]
+    sums = [sum(row) for row in hp]
+    down = sums[BEHIND] + sums[TIED] / 2
+    up = sums[AHEAD] + sums[TIED] / 2
+    ppot = (hp[BEHIND][AHEAD] + hp[BEHIND][TIED] / 2 + hp[TIED][AHEAD] / 2) / down if down else 0.0
+    npot = (hp[AHEAD][BEHIND] + hp[TIED][BEHIND] / 2 + hp[AHEAD][TIED] / 2) / up if up else 0.0
+    return HandStrength(hs, ppot, npot, runouts)
+
+
+class StrengthEngine(object):
+    """
+    Computes HandStrengths as strength() does, over every runout, or with
+    :samples over that many random ones on the flop (exact on the turn).  Those
+    against a random hand are kept, up to :maxsize of them, in a
+    least-recently-used cache by the canonical form of the hand and board
+    (see suits.canonical).
+    """
+
+    def __init__(self, samples=None, seed=None, maxsize=1 << 16, table=None):
+        self.samples = samples
+        self.seed = seed
+        self.maxsize = maxsize
+        self.table = table if table is not None else direct.shared_table()
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def strength(self, hand, board, opponent=None):
+        """The HandStrength of :hand on :board, against :opponent (a random hand if None)."""
+        samples = self.samples if len(board) == 3 else None
+        if opponent is not None:
+            return strength(hand, board, opponent, samples, self.seed, self.table)
+        key, _ = suits.canonical(hand, board)
+        result = self.cache.get(key)
+        if result is None:
+            self.misses += 1
+            # computed for the canonical form, so that the sampled runouts
+            # don't depend on which of the isomorphic hands came first
+            result = strength(key[0], key[1], None, samples, self.seed, self.table)
+            self.cache[key] = result
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return result
+
+    def ehs(self, hand, board, opponent=None):
+        """Just the effective hand strength of :hand on :board."""
+        return self.strength(hand, board, opponent).ehs
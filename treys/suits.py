@@ -0,0 +1,231 @@
+"""
+Suit symmetries.
+
+Poker hand values don't depend on which suit is which, so relabelling the
+suits (all at once, and consistently) never changes who wins.  If some cards
+are already fixed (hole cards, the board so far, dead cards), then two suits
+are still interchangeable if, in each group of fixed cards, they hold exactly
+the same ranks.  Then any two deals of further cards which differ only by
+swapping interchangeable suits have the same outcome, and need only be
+evaluated once, weighted by the number of such deals.
+
+In the integer form of a card the suit is just the nibble at bits 12-15 (one
+of card.SUITINTS), and the rank bit sits at bits 16-28, so most of what we
+need here is bit-shuffling of those two fields.  In particular, two sets of
+cards differ only by relabelling the suits exactly when the rankbits of
+their suits, sorted, are the same: that's canonical_key(), and putting the
+suits in that order gives the canonical form of canonical().
+
+runout_classes() enumerates deals of further cards one per such class.  A
+deal is built up as the set of ranks it gives each suit, in turn; within a
+class of suits, those sets are taken in decreasing order, which picks out
+exactly one deal per class, with no need to canonicalize anything after the
+fact.
+"""
+import itertools
+import math
+from . import card
+
+# Suit nibble => suit index (in card.SUITINTS order).
+SUIT_INDEX = [0, 0, 1, 0, 2, 0, 0, 0, 3]
+
+# Suit nibble => shift of that suit's rankbits, when the rankbits of all
+# four suits are packed into one int, 16 bits apiece.
+RANKBITS_SHIFT = [16 * i for i in SUIT_INDEX]
+
+# The 24 permutations of the suits, each as a tuple mapping suit index
+# (in card.SUITINTS order) to suit index; the identity comes first.
+PERMUTATIONS = tuple(itertools.permutations(range(4)))
+
+
+# Permutation (as a tuple) => its index in PERMUTATIONS.
+_PERMUTATION_INDEX = {p: i for i, p in enumerate(PERMUTATIONS)}
+
+
+def _card_map(perm):
+    m = {}
+    for c in card.FULL_DECK:
+        s = SUIT_INDEX[card.get_suit_int(c)]
+        m[c] = (c & ~0xF000) | (card.SUITINTS[perm[s]] << 12)
+    return m
+
+# For each permutation (by index into PERMUTATIONS), a dict mapping each
+# card (in integer form) to its image.
+CARD_MAPS = tuple(_card_map(perm) for perm in PERMUTATIONS)
+
+# For each permutation, the index of its inverse.
+INVERSES = tuple(PERMUTATIONS.index(tuple(p.index(s) for s in range(4))) for p in PERMUTATIONS)
+
+
+def rankbits_by_suit(cards):
+    """Returns the rankbits of each suit among :cards, as a list in card.SUITINTS order."""
+    bits = [0, 0, 0, 0]
+    for c in cards:
+        bits[SUIT_INDEX[(c >> 12) & 0xF]] |= c >> 16
+    return bits
+
+
+def suit_classes(*groups):
+    """
+    Partitions the suits (by index, in card.SUITINTS order) into classes of
+    interchangeable suits, given some groups of fixed cards; returns a list
+    of classes, each a list of suit indexes in increasing order.
+    """
+    signatures = list(zip(*(rankbits_by_suit(g) for g in groups))) if groups else [()] * 4
+    classes = {}
+    for s, signature in enumerate(signatures):
+        classes.setdefault(signature, []).append(s)
+    return sorted(classes.values())
+
+
+def permute(cards, index):
+    """Returns the images of :cards under permutation number :index."""
+    m = CARD_MAPS[index]
+    return [m[c] for c in cards]
+
+
+def packed_rankbits(cards):
+    """The rankbits of each suit among :cards, packed into one int 16 bits apiece (see RANKBITS_SHIFT)."""
+    packed = 0
+    for c in cards:
+        packed |= (c >> 16) << RANKBITS_SHIFT[(c >> 12) & 0xF]
+    return packed
+
+
+def canonical_key(cards):
+    """
+    A key for :cards under relabelling of the suits, the same for exactly
+    those sets of cards which differ only by it: the rankbits of each suit,
+    sorted and packed, 16 bits apiece.
+    """
+    packed = packed_rankbits(cards)
+    a, b, c, d = sorted((packed & 0xFFFF, (packed >> 16) & 0xFFFF,
+                         (packed >> 32) & 0xFFFF, packed >> 48))
+    return a | (b << 16) | (c << 32) | (d << 48)
+
+
+def canonical(*groups):
+    """
+    Returns the canonical form of some groups of cards (say, hole cards and
+    a board) under relabelling of the suits, together with the index of a
+    permutation which takes them to it.  The form is the images of the
+    groups, each a sorted tuple, with the suits put in decreasing order of
+    their rankbits in the first group, then the next, and so on; groups
+    which differ only by relabelling the suits have the same form.
+    """
+    signatures = list(zip(*(rankbits_by_suit(g) for g in groups)))
+    order = sorted(range(4), key=signatures.__getitem__, reverse=True)
+    perm = [0] * 4
+    for position, s in enumerate(order):
+        perm[s] = position
+    index = _PERMUTATION_INDEX[tuple(perm)]
+    m = CARD_MAPS[index]
+    return tuple(tuple(sorted(m[c] for c in g)) for g in groups), index
+
+
+def _count_arrangements(n):
+    """
+    For n suits in a class, whose rankbits come in decreasing order, maps the
+    tuple of flags (whether each is equal to the next) to the number of
+    distinct ways of handing those rankbits out among the n suits.
+    """
+    result = {}
+    for flags in itertools.product((False, True), repeat=n - 1):
+        weight = math.factorial(n)
+        run = 1
+        for equal in flags + (False,):
+            if equal:
+                run += 1
+            else:
+                weight //= math.factorial(run)
+                run = 1
+        result[flags] = weight
+    return result
+
+_arrangements = {}
+for _n in (2, 3, 4):
+    _arrangements.update(_count_arrangements(_n))
+
+
+def suit_options(avail, need):
+    """
+    For the available rankbits of a suit, returns a list, by number of cards
+    k (up to :need), of the (rankbits, prime product) of every way to deal k
+    cards in that suit, in decreasing order of rankbits.
+    """
+    ranks = [r for r in range(13) if avail & (1 << r)]
+    options = []
+    for k in range(need + 1):
+        combos = []
+        for chosen in itertools.combinations(ranks, k):
+            bits = sum(1 << r for r in chosen)
+            combos.append((bits, card.product_from_rankbits(bits)))
+        combos.sort(reverse=True)
+        options.append(combos)
+    return options
+
+
+def _deals(options, previous, left, masks, product):
+    """
+    Yields (rankbits by suit, prime product) for each representative deal
+    of :left more cards, given the rankbits already chosen for the first few
+    suits (:masks).  :previous maps each suit to the previous suit in its
+    class (or None); within a class, rankbits must not increase.
+    """
+    s = len(masks)
+    if s == 3:
+        for bits, p in _bounded(options[3][left], masks, previous[3]):
+            yield masks + (bits,), product * p
+        return
+    for k in range(left + 1):
+        for bits, p in _bounded(options[s][k], masks, previous[s]):
+            yield from _deals(options, previous, left - k, masks + (bits,), product * p)
+
+
+def _bounded(combos, masks, previous):
+    """The tail of :combos (in decreasing order) with rankbits at most those of suit :previous."""
+    if previous is None:
+        return combos
+    bound = masks[previous]
+    lo, hi = 0, len(combos)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if combos[mid][0] > bound:
+            lo = mid + 1
+        else:
+            hi = mid
+    return combos[lo:]
+
+
+def runout_classes(need, classes=None, known=(0, 0, 0, 0), firsts=None):
+    """
+    Yields (rankbits by suit, prime product, weight) for one deal of :need
+    more cards out of each class of deals which differ only by swapping
+    interchangeable suits, weight being the number of deals in the class.
+
+    :classes are the classes of interchangeable suits, as from
+    suit_classes() (all four suits in one if None), and :known the rankbits
+    already dealt in each suit.  With :firsts, a list of rankbits, only the
+    deals which give the first suit one of those are yielded; those from
+    suit_options(), split into pieces, share out the work.
+    """
+    if classes is None:
+        classes = [[0, 1, 2, 3]]
+    previous = [None] * 4
+    for cls in classes:
+        for a, b in zip(cls, cls[1:]):
+            previous[b] = a
+    multiples = [cls for cls in classes if len(cls) > 1]
+    options = [suit_options(0x1FFF & ~known[s], need) for s in range(4)]
+    if firsts is None:
+        firsts = [bits for combos in options[0] for bits, _ in combos]
+    for bits in firsts:
+        k = bin(bits).count('1')
+        if k > need:
+            continue
+        for masks, product in _deals(options, previous, need - k, (bits,),
+                                     card.product_from_rankbits(bits)):
+            weight = 1
+            for cls in multiples:
+                weight *= _arrangements[tuple(masks[a] == masks[b] for a, b in zip(cls, cls[1:]))]
+            yield masks, product, weight
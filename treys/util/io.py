@@ -1,3 +1,6 @@
+import os
+from collections import OrderedDict
+
 
 def write_table(table, filepath):
     """Writes a lookup table to a file."""
@@ -5,3 +8,65 @@ def write_table(table, filepath):
         for k,v in table.items():
             f.write(str(k)+","+str(v)+'\n')
 
+def read_table(filepath):
+    """Reads a lookup table, as written by write_table, back into an OrderedDict."""
+    table = OrderedDict()
+    with open(filepath, 'rt') as f:
+        for line in f:
+            k,v = line.split(',')
+            table[int(k)] = int(v)
+    return table
+
+def cache_path(filename):
+    """
+    Returns the path under which to cache a generated file: in the directory
+    named by the TREYS_CACHE environment variable if set, or ~/.cache/treys.
+    """
+    dirpath = os.environ.get('TREYS_CACHE')
+    if not dirpath:
+        dirpath = os.path.join(os.path.expanduser('~'), '.cache', 'treys')
+    return os.path.join(dirpath, filename)
+
+def replace_file(path, data):
+    """
+    Writes :data (bytes, or a sequence of byte chunks) to :path by way of a
+    temporary file, so that concurrent readers never see a partial file.
+    """
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    tmppath = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmppath, 'wb') as f:
+        if isinstance(data, bytes):
+            data = [data]
+        for chunk in data:
+            f.write(chunk)
+    os.replace(tmppath, path)
+
+# The byte-order mark in the header of each binary file we write; it reads
+# back as this only on a machine with the same byte order as the writer.
+BOM = 0x01020304
+
+def pack_header(header, magic, version, *fields):
+    """
+    Packs the header of a binary file: :header is a struct.Struct whose
+    first fields are the magic (8s), the version and the byte-order mark
+    (I each), and :fields fill in the rest.
+    """
+    return header.pack(magic, version, BOM, *fields)
+
+def check_header(header, data, magic, version, name, path):
+    """
+    Unpacks a header packed by pack_header from the start of :data (the
+    contents of :path), returning the rest of its fields.  Raises ValueError,
+    calling the file a :name, if it's too short, or has the wrong magic,
+    version or byte order.
+    """
+    if len(data) < header.size:
+        raise ValueError("%s is truncated: %s" % (name, path))
+    fields = header.unpack_from(data)
+    if fields[0] != magic or fields[1] != version:
+        raise ValueError("not a %s (version %d): %s" % (name, version, path))
+    if fields[2] != BOM:
+        raise ValueError("%s has the wrong byte order: %s" % (name, path))
+    return fields[3:]